@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+启动耗时基准测试
+
+使用`python -X importtime`统计导入fnclub_signer的耗时，检查导入时没有加载requests、bs4、notify等
+只在实际需要时才使用的模块，导入耗时超过预算或加载了这些模块时以非0状态码退出，可用于CI中跟踪启动开销。
+
+用法：
+    python benchmarks/bench_import.py [-n 次数] [--budget 毫秒] [--top 模块数]
+"""
+import os
+import re
+import sys
+import argparse
+import py_compile
+import subprocess
+import time
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 导入fnclub_signer时不应加载的模块
+LAZY_MODULES = ['requests', 'bs4', 'notify', 'smtplib', 'email', 'hmac', 'asyncio', 'aiohttp', 'sqlite3']
+
+IMPORTTIME_PATTERN = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$')
+
+
+def import_times():
+    """在新的解释器中导入fnclub_signer，返回[(模块名, 自身耗时us, 累计耗时us, 层级)]"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', 'import fnclub_signer'],
+        cwd=ROOT_DIR, capture_output=True, text=True, check=True
+    )
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        if name == 'site':
+            # site及之前的模块由解释器启动时加载，与fnclub_signer无关
+            modules = []
+            continue
+        modules.append((name, int(self_us), int(cumulative_us), len(indent) // 2))
+    return modules
+
+
+def wall_time(code, number):
+    """启动解释器执行code的最短耗时(毫秒)"""
+    best = None
+    for _ in range(number):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, check=True)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='启动耗时基准测试')
+    parser.add_argument('-n', '--number', type=int, default=5, help='测量次数，取最小值')
+    parser.add_argument('--budget', type=float, default=50, help='导入fnclub_signer的耗时预算(毫秒)')
+    parser.add_argument('--top', type=int, default=10, help='输出耗时最多的模块数')
+    args = parser.parse_args()
+
+    # 先生成字节码缓存，避免把编译时间计入导入耗时；设置了PYTHONDONTWRITEBYTECODE时导入不会写入缓存，需要显式编译
+    py_compile.compile(os.path.join(ROOT_DIR, 'fnclub_signer.py'), doraise=True)
+
+    runs = [import_times() for _ in range(args.number)]
+    best = min(runs, key=lambda modules: modules[-1][2])
+    total_ms = best[-1][2] / 1000
+
+    print(f"导入fnclub_signer耗时: {total_ms:.1f} ms (预算 {args.budget:.0f} ms)")
+    print(f"解释器启动: {wall_time('pass', args.number):.1f} ms，"
+          f"启动并导入: {wall_time('import fnclub_signer', args.number):.1f} ms")
+
+    print(f"\n{'模块':<40}{'自身(ms)':>10}{'累计(ms)':>10}")
+    for name, self_us, cumulative_us, _ in sorted(best[:-1], key=lambda item: item[1], reverse=True)[:args.top]:
+        print(f"{name:<40}{self_us / 1000:>10.2f}{cumulative_us / 1000:>10.2f}")
+
+    imported = {name.split('.')[0] for name, _, _, _ in best}
+    eager = [name for name in LAZY_MODULES if name in imported]
+    failed = False
+    if eager:
+        print(f"\n导入时加载了应延迟导入的模块: {', '.join(eager)}")
+        failed = True
+    if total_ms > args.budget:
+        print(f"\n导入耗时超过预算: {total_ms:.1f} ms > {args.budget:.0f} ms")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+HTML解析性能基准测试
+
+对比原先使用html.parser构建完整文档树的解析方式与新的解析层(SignPage/LoginPage/HtmlDoc)
+在fixtures目录下保存的页面上的单页解析耗时。
+
+用法：
+    python benchmarks/bench_parse.py [-n 次数]
+"""
+import os
+import re
+import sys
+import argparse
+import importlib.util
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+import fnclub_signer  # noqa: E402
+from fnclub_signer import Config, HtmlDoc, LoginPage, SignPage  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def legacy_home(html):
+    """原check_login_status的解析方式"""
+    soup = BeautifulSoup(html, 'html.parser')
+    login_links = soup.select('a[href*="member.php?mod=logging&action=login"]')
+    user_center_links = soup.select('a[href*="home.php?mod=space"]')
+    return len(login_links), len(user_center_links)
+
+
+def legacy_login(html):
+    """原login的解析方式"""
+    soup = BeautifulSoup(html, 'html.parser')
+    login_form = None
+    for form in soup.find_all('form'):
+        form_id = form.get('id', '')
+        if form_id and ('loginform' in form_id or 'lsform' in form_id):
+            login_form = form
+            break
+    formhash = soup.find('input', {'name': 'formhash'})
+    username_input = soup.find('input', {'name': 'username'})
+    password_input = soup.find('input', {'name': 'password'})
+    seccodeverify = soup.find('input', {'name': 'seccodeverify'})
+    captcha_img = soup.find('img', {'src': re.compile(r'misc\.php\?mod=seccode')})
+    return login_form, formhash, username_input, password_input, seccodeverify, captcha_img
+
+
+def legacy_sign(html):
+    """原check_sign_status和get_sign_info的解析方式"""
+    soup = BeautifulSoup(html, 'html.parser')
+    sign_btn = soup.select_one('.signbtn .btna')
+    sign_info = {}
+    for div in soup.find_all('div', class_='bm'):
+        header = div.find('div', class_='bm_h')
+        if header and '我的打卡动态' in header.get_text():
+            for item in div.find('div', class_='bm_c').find_all('li'):
+                text = item.get_text(strip=True)
+                if '：' in text:
+                    key, value = text.split('：', 1)
+                    sign_info[key] = value
+            break
+    return sign_btn, sign_info
+
+
+def new_home(html):
+    doc = HtmlDoc(html, parse_only={'name': 'a'})
+    login_links = doc.select('a[href*="member.php?mod=logging&action=login"]')
+    user_center_links = doc.select('a[href*="home.php?mod=space"]')
+    return len(login_links), len(user_center_links)
+
+
+CASES = [
+    ('index.html', legacy_home, new_home),
+    ('login.html', legacy_login, LoginPage),
+    ('login_seccode.html', legacy_login, LoginPage),
+    ('sign_unsigned.html', legacy_sign, SignPage),
+    ('sign_signed.html', legacy_sign, SignPage),
+]
+
+
+def available_backends():
+    backends = ['html.parser']
+    for name in ('lxml', 'selectolax'):
+        if importlib.util.find_spec(name) is not None:
+            backends.append(name)
+    return backends
+
+
+def use_backend(name):
+    Config.HTML_PARSER = name
+    fnclub_signer._parser_backend = None
+
+
+def measure(func, html, number):
+    """返回单页平均耗时(毫秒)"""
+    return min(timeit.repeat(lambda: func(html), number=number, repeat=3)) / number * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTML解析性能基准测试')
+    parser.add_argument('-n', '--number', type=int, default=50, help='每轮解析次数')
+    args = parser.parse_args()
+
+    backends = available_backends()
+    header = f"{'页面':<20}{'大小(KB)':>10}{'原解析(ms)':>12}" + ''.join(f"{name + '(ms)':>18}" for name in backends)
+    print(header)
+    print('-' * len(header.encode('gbk')))
+
+    for filename, legacy, new in CASES:
+        with open(os.path.join(FIXTURE_DIR, filename), encoding='utf-8') as f:
+            html = f.read()
+
+        row = f"{filename:<20}{len(html.encode('utf-8')) / 1024:>10.1f}{measure(legacy, html, args.number):>12.3f}"
+        for name in backends:
+            use_backend(name)
+            row += f"{measure(new, html, args.number):>18.3f}"
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
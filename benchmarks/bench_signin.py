@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+端到端签到基准测试
+
+在本地启动模拟的Discuz论坛（首页、登录页面及可选的验证码、验证码图片、未签到/已签到两种状态的签到页面）
+和模拟的百度OAuth/OCR接口，页面内容来自fixtures目录。脚本将fnclub_signer指向模拟服务，
+按指定的账号数和网络延迟驱动完整的签到流程，输出吞吐量、单账号耗时的p50/p99和每个账号的请求数。
+
+每个场景运行三轮：第一轮没有Cookie，需要登录；第二轮使用第一轮保存的Cookie（模拟第二天签到）；
+第三轮模拟同一天再次运行，所有账号都已记录在本地签到记录中。
+
+用法：
+    python benchmarks/bench_signin.py [-a 账号数] [--latency 毫秒] [--seccode] [--async] [-w 线程数]
+"""
+import os
+import sys
+import json
+import math
+import random
+import logging
+import argparse
+import tempfile
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fnclub_signer  # noqa: E402
+from fnclub_signer import AccountFormatter, AsyncFNSignIn, AsyncSignEngine, Config, FNSignIn, SignEngine  # noqa: E402
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# 模拟论坛使用的Cookie前缀和验证码答案
+COOKIE_PRE = 'pvYO_2132_'
+CAPTCHA_ANSWER = 'K7PM'
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURE_DIR, name), 'rb') as f:
+        return f.read()
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """模拟Discuz论坛和百度OCR接口的请求处理"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def handle_request(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency * random.uniform(0.8, 1.2))
+
+        url = urllib.parse.urlsplit(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        length = int(self.headers.get('Content-Length') or 0)
+        form = dict(urllib.parse.parse_qsl(self.rfile.read(length).decode('utf-8'))) if length else {}
+        user = self.current_user()
+
+        if url.path in ('/', '/forum.php'):
+            server.count('index')
+            return self.reply(server.fixtures['index.html'])
+
+        if url.path == '/member.php' and query.get('mod') == 'logging':
+            if self.command == 'GET':
+                server.count('login_page')
+                return self.reply(server.fixtures['login_seccode.html' if server.seccode else 'login.html'])
+            server.count('login_post')
+            if server.seccode and form.get('seccodeverify', '').upper() != CAPTCHA_ANSWER:
+                return self.reply('<?xml version="1.0" encoding="utf-8"?><root><![CDATA[验证码错误]]></root>'.encode('utf-8'))
+            cookie = f"{COOKIE_PRE}auth={urllib.parse.quote(form.get('username', ''))}; expires=Fri, 01 Jan 2038 00:00:00 GMT; path=/; HttpOnly"
+            body = "<?xml version=\"1.0\" encoding=\"utf-8\"?><root><![CDATA[<script type=\"text/javascript\">succeedhandle_login('forum.php', '欢迎您回来', {});</script>]]></root>"
+            return self.reply(body.encode('utf-8'), cookie=cookie)
+
+        if url.path == '/misc.php' and query.get('mod') == 'seccode':
+            server.count('captcha')
+            return self.reply(server.fixtures['seccode.png'], content_type='image/png')
+
+        if url.path == '/plugin.php' and query.get('id') == 'zqlj_sign':
+            if not user:
+                server.count('sign_guest')
+                return self.reply(server.fixtures['login.html'])
+            if 'sign' in query:
+                server.count('sign')
+                with server.lock:
+                    server.signed.add(user)
+            else:
+                server.count('sign_page')
+            return self.reply(server.fixtures['sign_signed.html' if user in server.signed else 'sign_unsigned.html'])
+
+        if url.path == '/oauth/2.0/token':
+            server.count('oauth')
+            return self.reply_json({'access_token': 'bench-token', 'expires_in': 2592000})
+
+        if url.path == '/rest/2.0/ocr/v1/accurate_basic':
+            server.count('ocr')
+            words = CAPTCHA_ANSWER if random.random() >= server.ocr_error_rate else CAPTCHA_ANSWER[::-1]
+            return self.reply_json({'words_result': [{'words': words, 'probability': {'average': 0.93}}], 'words_result_num': 1})
+
+        server.count('not_found')
+        self.reply(b'not found', status=404)
+
+    def current_user(self):
+        for part in self.headers.get('Cookie', '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == f'{COOKIE_PRE}auth':
+                return urllib.parse.unquote(value)
+        return None
+
+    def reply(self, body, status=200, content_type='text/html; charset=utf-8', cookie=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if cookie:
+            self.send_header('Set-Cookie', cookie)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def reply_json(self, data):
+        self.reply(json.dumps(data).encode('utf-8'), content_type='application/json')
+
+
+class StubServer(ThreadingHTTPServer):
+    """模拟论坛服务器，记录每类请求的次数"""
+
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, latency=0.0, seccode=False, ocr_error_rate=0.0):
+        super().__init__(('127.0.0.1', 0), StubHandler)
+        self.latency = latency
+        self.seccode = seccode
+        self.ocr_error_rate = ocr_error_rate
+        self.fixtures = {
+            name: load_fixture(name)
+            for name in ('index.html', 'login.html', 'login_seccode.html', 'sign_unsigned.html',
+                         'sign_signed.html', 'seccode.png')
+        }
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.signed = set()
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.server_port}/'
+
+    def count(self, endpoint):
+        with self.lock:
+            self.counts[endpoint] += 1
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, name='stub_forum', daemon=True).start()
+        return self
+
+
+def point_at(base_url, data_dir, rate=0.0, burst=1):
+    """将fnclub_signer的所有地址和本地文件指向模拟服务和临时目录
+
+    模拟的论坛和OCR接口在同一个地址上，限流时共用一个令牌桶。
+    """
+    Config.BASE_URL = base_url
+    Config.LOGIN_URL = base_url + 'member.php?mod=logging&action=login'
+    Config.SIGN_URL = base_url + 'plugin.php?id=zqlj_sign'
+    Config.CAPTCHA_API_URL = base_url + 'rest/2.0/ocr/v1/accurate_basic'
+    Config.TOKEN_URL = base_url + 'oauth/2.0/token'
+    Config.API_KEY = Config.SECRET_KEY = 'bench'
+    Config.CAPTCHA_SOLVERS = 'baidu'
+    Config.CAPTCHA_LEARN = False
+    Config.DATA_DB = os.path.join(data_dir, 'fnclub.db')
+    Config.TOKEN_CACHE_FILE = os.path.join(data_dir, 'token_cache.json')
+    Config.COOKIE_FILE = os.path.join(data_dir, 'cookies.json')
+    Config.COOKIE_DIR = os.path.join(data_dir, 'cookies')
+    Config.METRICS_JSON = Config.METRICS_TEXTFILE = ''
+    Config.FORUM_RATE = Config.OCR_RATE = rate
+    Config.FORUM_BURST = Config.OCR_BURST = burst
+    FNSignIn.LOGIN_SUBMIT_URL = f"{Config.LOGIN_URL}&loginsubmit=yes&inajax=1"
+    FNSignIn.LOGIN_HEADERS = dict(FNSignIn.LOGIN_HEADERS, Origin=base_url.rstrip('/'), Referer=Config.LOGIN_URL)
+    fnclub_signer._captcha_chain = None
+    fnclub_signer._token_provider = None
+    fnclub_signer._cookie_store = None
+    fnclub_signer._sign_ledger = None
+    fnclub_signer._rate_limiters = None
+
+
+class TimedSignEngine(SignEngine):
+    """记录每个账号签到耗时的线程池签到引擎"""
+
+    def __init__(self, accounts, max_workers=None):
+        super().__init__(accounts, max_workers)
+        self.durations = []
+
+    def sign_account(self, username, password, deadline):
+        start = time.perf_counter()
+        try:
+            return super().sign_account(username, password, deadline)
+        finally:
+            self.durations.append(time.perf_counter() - start)
+
+
+class TimedAsyncSignEngine(AsyncSignEngine):
+    """记录每个账号签到耗时的异步签到引擎，不计入等待并发名额的时间"""
+
+    def __init__(self, accounts, concurrency=None):
+        super().__init__(accounts, concurrency)
+        self.durations = []
+
+    async def sign_account_async(self, username, password, deadline, connector, semaphore):
+        async with semaphore:
+            start = time.perf_counter()
+            client = AsyncFNSignIn(username, password, connector)
+            try:
+                return await client.collect(deadline, self.metrics)
+            finally:
+                await client.close()
+                self.durations.append(time.perf_counter() - start)
+
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, math.ceil(p * len(values)) - 1)]
+
+
+def run_round(server, accounts, args):
+    """运行一轮签到，返回统计结果"""
+    if args.use_async:
+        engine = TimedAsyncSignEngine(accounts, args.workers)
+    else:
+        engine = TimedSignEngine(accounts, args.workers)
+
+    before = Counter(server.counts)
+    start = time.perf_counter()
+    try:
+        results = engine.run()
+        elapsed = time.perf_counter() - start
+    finally:
+        engine.close()
+    requests = server.counts - before
+
+    return {
+        'success': sum(1 for result in results if result['success']),
+        'elapsed': elapsed,
+        'p50': percentile(engine.durations, 0.5),
+        'p99': percentile(engine.durations, 0.99),
+        'max': max(engine.durations, default=0.0),
+        'requests': requests,
+        'metrics': engine.metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='端到端签到基准测试')
+    parser.add_argument('-a', '--accounts', type=int, default=50, help='账号数')
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help='并发数，线程模式默认FN_MAX_WORKERS，异步模式默认FN_ASYNC_CONCURRENCY')
+    parser.add_argument('--latency', type=float, default=20, help='模拟服务每个请求的延迟(毫秒)，实际延迟在±20%%内随机')
+    parser.add_argument('--seccode', action='store_true', help='登录页面要求验证码，通过模拟的百度OCR识别')
+    parser.add_argument('--ocr-error-rate', type=float, default=0.0, help='模拟OCR返回错误结果的比例')
+    parser.add_argument('--rate', type=float, default=0, help='模拟服务的限流速率(请求/秒)，0表示不限流')
+    parser.add_argument('--burst', type=int, default=10, help='限流允许的突发请求数')
+    parser.add_argument('--async', dest='use_async', action='store_true', help='使用AsyncFNSignIn，需要安装aiohttp')
+    parser.add_argument('-v', '--verbose', action='store_true', help='输出签到日志和各阶段统计')
+    args = parser.parse_args()
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(AccountFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.ERROR, handlers=[handler])
+
+    server = StubServer(args.latency / 1000, args.seccode, args.ocr_error_rate).start()
+    accounts = [(f'bench{number:05d}', 'password') for number in range(args.accounts)]
+
+    with tempfile.TemporaryDirectory(prefix='fn_bench_') as data_dir:
+        point_at(server.base_url, data_dir, args.rate, args.burst)
+        print(f"模式: {'asyncio' if args.use_async else '线程池'}，账号数: {args.accounts}，"
+              f"延迟: {args.latency:.0f}ms，验证码: {'是' if args.seccode else '否'}，"
+              f"限流: {f'{args.rate:g}/s 突发{args.burst}' if args.rate else '无'}")
+
+        header = f"{'轮次':<14}{'成功':>8}{'总耗时(s)':>12}{'吞吐(账号/s)':>14}{'p50(ms)':>10}{'p99(ms)':>10}{'max(ms)':>10}{'请求/账号':>10}"
+        print(header)
+        print('-' * len(header.encode('gbk')))
+        for name, force in (('冷启动(登录)', True), ('Cookie有效', True), ('本地已签到', False)):
+            # 前两轮都从未签到状态开始，忽略上一轮的本地签到记录
+            Config.FORCE = force
+            if force:
+                server.signed.clear()
+            stats = run_round(server, accounts, args)
+            requests = sum(stats['requests'].values())
+            print(f"{name:<14}{stats['success']:>8}{stats['elapsed']:>12.2f}"
+                  f"{len(accounts) / stats['elapsed']:>14.1f}{stats['p50'] * 1000:>10.1f}"
+                  f"{stats['p99'] * 1000:>10.1f}{stats['max'] * 1000:>10.1f}{requests / len(accounts):>10.2f}")
+            if args.verbose:
+                print('  请求分布: ' + ', '.join(f"{key}={value}" for key, value in sorted(stats['requests'].items())))
+                for line in stats['metrics'].summary():
+                    print(f"  {line}")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
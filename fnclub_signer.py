@@ -4,31 +4,139 @@
 name: 飞牛论坛签到
 cron: 5 0 * * *
 """
+# requests、bs4、notify、asyncio等较重的模块在首次使用时才导入，今日已签到等简短的运行无需加载
 import os
 import re
 import json
 import time
+import random
 import logging
-import requests
-import base64
+import contextlib
+import contextvars
+import functools
+import threading
+import importlib.util
 import urllib.parse
-from bs4 import BeautifulSoup
-from datetime import datetime
-from notify import send
-
-# 配置日志
-log_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs')
-os.makedirs(log_dir, exist_ok=True)
-log_file = os.path.join(log_dir, f'sign_{datetime.now().strftime("%Y%m%d")}.log')
-
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_file, encoding='utf-8'),
-        logging.StreamHandler()
-    ]
-)
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from html import unescape
+from datetime import datetime, timedelta, timezone, time as dtime
+
+
+class DailyFileHandler(logging.FileHandler):
+    """按日期写入sign_YYYYMMDD.log，常驻运行跨天时自动切换到新的日志文件，并删除超过保留天数的旧日志"""
+
+    def __init__(self, directory, suffix='.log', backup_days=0):
+        self.directory = directory
+        self.suffix = suffix
+        self.backup_days = backup_days
+        self.day = datetime.now().strftime('%Y%m%d')
+        super().__init__(self.day_file(self.day), encoding='utf-8', delay=True)
+        self.remove_expired()
+
+    def day_file(self, day):
+        return os.path.join(self.directory, f'sign_{day}{self.suffix}')
+
+    def remove_expired(self):
+        if self.backup_days <= 0:
+            return
+        cutoff = (datetime.strptime(self.day, '%Y%m%d') - timedelta(days=self.backup_days)).strftime('%Y%m%d')
+        pattern = re.compile(r'sign_(\d{8})' + re.escape(self.suffix))
+        for name in os.listdir(self.directory):
+            match = pattern.fullmatch(name)
+            if match and match.group(1) < cutoff:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def emit(self, record):
+        # emit在持有handler锁时调用，可以安全地切换文件
+        day = datetime.fromtimestamp(record.created).strftime('%Y%m%d')
+        if day != self.day:
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+            self.day = day
+            self.baseFilename = self.day_file(day)
+            self.remove_expired()
+        super().emit(record)
+
+
+class AccountFormatter(logging.Formatter):
+    """文本日志格式，账号的日志在消息前加上账号标识，便于区分并发执行的多个账号"""
+
+    def formatMessage(self, record):
+        account = getattr(record, 'account', None)
+        if not account:
+            return super().formatMessage(record)
+        # 同一条记录会依次交给多个handler，格式化后恢复原消息
+        message = record.message
+        record.message = f"[{account}] {message}"
+        try:
+            return super().formatMessage(record)
+        finally:
+            record.message = message
+
+
+class JsonFormatter(logging.Formatter):
+    """JSON Lines日志格式，账号的日志带有account字段"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+        }
+        account = getattr(record, 'account', None)
+        if account:
+            data['account'] = account
+        data['message'] = record.getMessage()
+        if record.exc_info:
+            data['exception'] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class LogQueueHandler(logging.Handler):
+    """将日志记录原样放入队列，消息格式化和文件、控制台输出都在后台线程中进行
+
+    日志参数在放入队列后才格式化，调用方传入的参数之后不应再修改。
+    """
+
+    def __init__(self, queue):
+        super().__init__()
+        self.queue = queue
+
+    def emit(self, record):
+        self.queue.put_nowait(record)
+
+
+def setup_logging():
+    """配置日志输出到控制台和按日期命名的日志文件，由脚本入口调用，导入模块时不创建任何文件
+
+    日志记录经队列交给后台线程写入，多个账号并发签到时不会因为磁盘和控制台输出阻塞。
+    返回后台线程的QueueListener，进程退出时自动停止并写完队列中剩余的日志。
+    """
+    import atexit
+    import queue
+    from logging.handlers import QueueListener
+
+    os.makedirs(Config.LOG_DIR, exist_ok=True)
+    text_formatter = AccountFormatter('%(asctime)s - %(levelname)s - %(message)s')
+    if Config.LOG_FORMAT == 'json':
+        file_handler = DailyFileHandler(Config.LOG_DIR, '.jsonl', Config.LOG_BACKUP_DAYS)
+        file_handler.setFormatter(JsonFormatter())
+    else:
+        file_handler = DailyFileHandler(Config.LOG_DIR, '.log', Config.LOG_BACKUP_DAYS)
+        file_handler.setFormatter(text_formatter)
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(text_formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    logging.basicConfig(level=logging.INFO, handlers=[LogQueueHandler(log_queue)])
+    return listener
+
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +147,11 @@ class Config:
     USERNAME = os.getenv('FN_USERNAME', '')  # 修改为你的用户名
     PASSWORD = os.getenv('FN_PASSWORD', '')  # 修改为你的密码
     
+    # 多账号配置，格式：用户名1:密码1&用户名2:密码2（也支持换行分隔）
+    ACCOUNTS = os.getenv('FN_ACCOUNTS', '')
+    # 多账号并发签到的最大线程数
+    MAX_WORKERS = int(os.getenv('FN_MAX_WORKERS', '5'))
+    
     # 网站URL
     BASE_URL = 'https://club.fnnas.com/'
     LOGIN_URL = BASE_URL + 'member.php?mod=logging&action=login'
@@ -46,592 +159,3046 @@ class Config:
     
     # Cookie文件路径
     COOKIE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cookies.json')
+    # 多账号Cookie目录，每个账号一个Cookie文件
+    COOKIE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cookies')
+    # 本地数据库，所有账号的Cookie保存在同一个SQLite文件中，旧的Cookie文件首次加载时自动迁移
+    DATA_DB = os.getenv('FN_DATA_DB', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fnclub.db'))
+    # 论坛按北京时间(UTC+8)划分签到日期，本地签到记录按该日期判断账号今日是否已签到
+    SITE_UTC_OFFSET = 8
+    # 忽略本地签到记录，今日已签到的账号也重新访问论坛检查（也可以使用--force参数）
+    FORCE = os.getenv('FN_FORCE', 'false') == 'true'
     
     # 验证码识别API (百度OCR API)
     CAPTCHA_API_URL = "https://aip.baidubce.com/rest/2.0/ocr/v1/accurate_basic"
+    TOKEN_URL = "https://aip.baidubce.com/oauth/2.0/token"
+    
+    # 验证码识别后端，按顺序尝试：local 本地模板匹配（需要Pillow和NumPy），baidu 百度OCR
+    CAPTCHA_SOLVERS = os.getenv('FN_CAPTCHA_SOLVERS', 'local,baidu')
+    # 本地识别的字符模板目录
+    CAPTCHA_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'captcha_templates')
+    CAPTCHA_LENGTH = 4  # 验证码字符数
+    CAPTCHA_LOCAL_MIN_SCORE = 0.75  # 本地识别的最低置信度，低于该值时交给下一个后端
+    CAPTCHA_LEARN = os.getenv('FN_CAPTCHA_LEARN', 'true') == 'true'  # 将其他后端识别正确的验证码保存为本地模板
+    # 验证码识别模式：chain 按顺序逐个尝试，race 所有后端同时识别，采用第一个置信度达标的结果
+    CAPTCHA_MODE = os.getenv('FN_CAPTCHA_MODE', 'chain')
+    CAPTCHA_MIN_CONFIDENCE = 0.8  # race模式下直接采用识别结果的最低置信度
+    CAPTCHA_PREFETCH = os.getenv('FN_CAPTCHA_PREFETCH', 'true') == 'true'  # 解析登录表单的同时下载验证码图片
+    CAPTCHA_RESUBMITS = 2  # 验证码错误时刷新验证码直接重新提交的次数，无需重新获取登录页面
+    # 按域名限制请求速率(令牌桶)，多个账号并发签到时避免请求过快被论坛限制，速率为0表示不限制
+    FORUM_RATE = float(os.getenv('FN_FORUM_RATE', '5'))  # 论坛每秒请求数
+    FORUM_BURST = int(os.getenv('FN_FORUM_BURST', '10'))  # 论坛允许的突发请求数
+    OCR_RATE = float(os.getenv('FN_OCR_RATE', '2'))  # 百度OCR每秒请求数
+    OCR_BURST = int(os.getenv('FN_OCR_BURST', '2'))  # 百度OCR允许的突发请求数
+    # 百度OCR连接池大小，多账号同时登录时复用长连接
+    OCR_POOL_SIZE = int(os.getenv('FN_OCR_POOL_SIZE', '0')) or MAX_WORKERS
     API_KEY = os.getenv('FN_BD_API_KEY', '')  # 替换为你的百度OCR API Key
     SECRET_KEY = os.getenv('FN_BD_SECRET_KEY', '')  # 替换为你的百度OCR Secret Key
     
+    # 登录状态检测方式：fast 先离线检查Cookie过期时间再通过签到页面快速检测，full 解析论坛首页
+    LOGIN_PROBE = os.getenv('FN_LOGIN_PROBE', 'fast')
+    
+    # HTTP超时设置(秒)
+    CONNECT_TIMEOUT = float(os.getenv('FN_CONNECT_TIMEOUT', '5'))  # 建立连接超时
+    READ_TIMEOUT = float(os.getenv('FN_READ_TIMEOUT', '20'))  # 读取响应超时
+    
+    # HTML解析后端：auto 按 selectolax > lxml > html.parser 的顺序使用已安装的解析器
+    HTML_PARSER = os.getenv('FN_HTML_PARSER', 'auto')
+    
     # 重试设置
     MAX_RETRIES = 3  # 最大重试次数
-    RETRY_DELAY = 2  # 重试间隔(秒)
+    RETRY_DELAY = 2  # 首次重试间隔(秒)，之后按指数退避
+    RETRY_MAX_DELAY = 30  # 最大重试间隔(秒)
+    RETRY_JITTER = 0.5  # 重试间隔的随机抖动比例，避免多个账号同时重试
+    # 各操作的最大尝试次数，未配置的操作使用MAX_RETRIES
+    RETRY_BUDGETS = {
+        'token': 3,
+        'captcha': 3,
+        'login': 3,
+        'sign_status': 3,
+        'sign': 3,
+        'sign_info': 3,
+    }
+    # 单个账号的签到总耗时上限(秒)，0表示不限制
+    ACCOUNT_TIME_BUDGET = int(os.getenv('FN_ACCOUNT_TIME_BUDGET', '180'))
+    # 整个运行过程的截止时间(秒)，包括所有账号和嵌套的重试，0表示不限制
+    RUN_DEADLINE = int(os.getenv('FN_RUN_DEADLINE', '600'))
+    
+    # 常驻模式(--daemon)每天的签到时间，每个账号在此基础上随机延后0~DAEMON_JITTER秒
+    DAEMON_TIME = os.getenv('FN_DAEMON_TIME', '00:05')
+    DAEMON_JITTER = int(os.getenv('FN_DAEMON_JITTER', '1800'))
+    # 常驻模式下签到失败的账号当天重试的次数和首次重试的间隔(秒)，之后每次间隔加倍
+    DAEMON_RETRIES = int(os.getenv('FN_DAEMON_RETRIES', '3'))
+    DAEMON_RETRY_DELAY = int(os.getenv('FN_DAEMON_RETRY_DELAY', '900'))
+    
+    # 每次运行的分阶段耗时统计，配置路径后导出为JSON和Prometheus textfile collector格式
+    METRICS_JSON = os.getenv('FN_METRICS_JSON', '')
+    METRICS_TEXTFILE = os.getenv('FN_METRICS_TEXTFILE', '')
+    
+    # 日志设置
+    LOG_DIR = os.getenv('FN_LOG_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'logs'))
+    LOG_FORMAT = os.getenv('FN_LOG_FORMAT', 'text')  # 日志文件格式：text 文本，json 每行一条JSON记录(sign_YYYYMMDD.jsonl)
+    LOG_BACKUP_DAYS = int(os.getenv('FN_LOG_BACKUP_DAYS', '30'))  # 日志文件保留天数，0表示不删除
+    
+    # 异步签到(--async)同时进行的最大账号数，所有账号共享一个事件循环和连接池
+    ASYNC_CONCURRENCY = int(os.getenv('FN_ASYNC_CONCURRENCY', '100'))
     
     # Token缓存文件
     TOKEN_CACHE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'token_cache.json')
+    TOKEN_REFRESH_AHEAD = 3 * 86400  # token剩余有效期少于该时间(秒)时在后台提前刷新
 
 
-class FNSignIn:
+def load_accounts():
+    """读取账号列表，优先使用FN_ACCOUNTS，未配置时回退到单账号FN_USERNAME/FN_PASSWORD"""
+    accounts = []
+    for item in re.split(r'[&\n]', Config.ACCOUNTS):
+        item = item.strip()
+        if not item or ':' not in item:
+            continue
+        username, password = item.split(':', 1)
+        if username.strip():
+            accounts.append((username.strip(), password))
+
+    if not accounts and Config.USERNAME:
+        accounts.append((Config.USERNAME, Config.PASSWORD))
+    return accounts
+
+
+class AccountLogger(logging.LoggerAdapter):
+    """为日志记录加上账号标识(record.account)，由AccountFormatter和JsonFormatter输出"""
+
+    def process(self, msg, kwargs):
+        kwargs['extra'] = dict(kwargs.get('extra') or {}, **self.extra)
+        return msg, kwargs
+
+
+class Deadline:
+    """截止时间，用于限制整个运行过程（包括嵌套的重试）的总耗时"""
+
+    def __init__(self, seconds=None):
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    def remaining(self):
+        """剩余时间(秒)，不限制时返回None"""
+        if self.expires_at is None:
+            return None
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def child(self, seconds):
+        """创建不晚于当前截止时间、且最多持续seconds秒的子截止时间"""
+        deadline = Deadline(seconds)
+        if deadline.expires_at is None or (self.expires_at is not None and self.expires_at < deadline.expires_at):
+            deadline.expires_at = self.expires_at
+        return deadline
+
+    def timeout(self):
+        """按剩余时间收紧的(连接超时, 读取超时)，剩余时间用尽时抛出TimeBudgetExceeded"""
+        remaining = self.remaining()
+        if remaining is None:
+            return Config.CONNECT_TIMEOUT, Config.READ_TIMEOUT
+        if remaining <= 0:
+            raise TimeBudgetExceeded("签到耗时超过时间预算")
+        return min(Config.CONNECT_TIMEOUT, remaining), min(Config.READ_TIMEOUT, remaining)
+
+
+class TimeBudgetExceeded(Exception):
+    """签到耗时超过时间预算"""
+
+
+class Attempt:
+    """一次尝试的序号信息，格式化为"当前次数/总次数"用于日志"""
+
+    def __init__(self, number, total):
+        self.number = number
+        self.total = total
+
+    def __str__(self):
+        return f"{self.number}/{self.total}"
+
+
+# 当前正在统计的(Metrics, 阶段名)，请求数、重试次数和流量计入该阶段
+_current_phase = contextvars.ContextVar('fn_current_phase', default=None)
+
+
+class PhaseOutcome:
+    """阶段的执行结果，默认成功，阶段内发生异常或调用方标记失败时记为失败"""
+
+    def __init__(self):
+        self.ok = True
+
+
+class Metrics:
+    """一次运行的分阶段统计
+
+    记录每个阶段（登录检测、登录页面、验证码下载、验证码识别、提交登录、签到状态、签到、签到信息、通知）
+    的调用次数、成功/失败次数、耗时，以及阶段内的请求数、重试次数、响应字节数和等待限流的时间，
+    另外按域名统计限流等待。
+    当前阶段保存在contextvars中，线程池和asyncio任务中的请求也能计入正确的阶段。
+    """
+
+    PHASES = ('login_probe', 'login', 'login_page', 'captcha', 'ocr', 'login_post',
+              'sign_status', 'sign', 'sign_info', 'notify')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.finished = None
+        self.phases = {}
+        self.accounts = {}
+        self.rate_limits = {}
+
+    def stats(self, phase):
+        if phase not in self.phases:
+            self.phases[phase] = {
+                'count': 0, 'success': 0, 'failure': 0, 'seconds': 0.0, 'max_seconds': 0.0,
+                'requests': 0, 'retries': 0, 'bytes': 0, 'rate_wait_seconds': 0.0,
+            }
+        return self.phases[phase]
+
+    @contextlib.contextmanager
+    def phase(self, name, account=None):
+        """统计一个阶段，with语句内的请求和重试计入该阶段"""
+        outcome = PhaseOutcome()
+        token = _current_phase.set((self, name))
+        start = time.perf_counter()
+        try:
+            yield outcome
+        except BaseException:
+            outcome.ok = False
+            raise
+        finally:
+            _current_phase.reset(token)
+            self.record(name, time.perf_counter() - start, outcome.ok, account)
+
+    def record(self, phase, seconds, ok, account=None):
+        with self.lock:
+            stats = self.stats(phase)
+            stats['count'] += 1
+            stats['success' if ok else 'failure'] += 1
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            if account is not None:
+                phases = self.accounts.setdefault(account, {})
+                phases[phase] = phases.get(phase, 0.0) + seconds
+
+    def add(self, phase, **counts):
+        with self.lock:
+            stats = self.stats(phase)
+            for key, value in counts.items():
+                stats[key] += value
+
+    @staticmethod
+    def count_request(response):
+        """将请求计入当前阶段"""
+        current = _current_phase.get()
+        if current is not None:
+            metrics, phase = current
+            metrics.add(phase, requests=1, bytes=len(response.content or b''))
+
+    @staticmethod
+    def count_retry():
+        """将重试计入当前阶段"""
+        current = _current_phase.get()
+        if current is not None:
+            metrics, phase = current
+            metrics.add(phase, retries=1)
+
+    @staticmethod
+    def count_rate_wait(host, seconds):
+        """将等待限流的时间计入当前阶段和对应域名"""
+        current = _current_phase.get()
+        if current is None:
+            return
+        metrics, phase = current
+        with metrics.lock:
+            metrics.stats(phase)['rate_wait_seconds'] += seconds
+            stats = metrics.rate_limits.setdefault(
+                host, {'requests': 0, 'delayed': 0, 'wait_seconds': 0.0, 'max_wait_seconds': 0.0}
+            )
+            stats['requests'] += 1
+            if seconds > 0:
+                stats['delayed'] += 1
+                stats['wait_seconds'] += seconds
+                stats['max_wait_seconds'] = max(stats['max_wait_seconds'], seconds)
+
+    def ordered_phases(self):
+        names = [name for name in self.PHASES if name in self.phases]
+        names += sorted(name for name in self.phases if name not in self.PHASES)
+        return [(name, self.phases[name]) for name in names]
+
+    def summary(self):
+        """每个阶段一行的文字摘要，用于日志"""
+        lines = []
+        for name, stats in self.ordered_phases():
+            average = stats['seconds'] / stats['count'] if stats['count'] else 0
+            lines.append(
+                f"{name}: 次数{stats['count']}(失败{stats['failure']}) 总耗时{stats['seconds']:.2f}s "
+                f"平均{average:.3f}s 最长{stats['max_seconds']:.3f}s 请求{stats['requests']} "
+                f"重试{stats['retries']} 流量{stats['bytes'] / 1024:.1f}KB 限流等待{stats['rate_wait_seconds']:.2f}s"
+            )
+        for host, stats in sorted(self.rate_limits.items()):
+            lines.append(
+                f"限流 {host}: 请求{stats['requests']} 等待{stats['delayed']}次 "
+                f"总等待{stats['wait_seconds']:.2f}s 最长{stats['max_wait_seconds']:.3f}s"
+            )
+        return lines
+
+    def to_dict(self, results=()):
+        finished = self.finished or time.time()
+        return {
+            'started': datetime.fromtimestamp(self.started).isoformat(timespec='seconds'),
+            'duration': round(finished - self.started, 3),
+            'accounts': len(results),
+            'success': sum(1 for result in results if result['success']),
+            'timeout': sum(1 for result in results if result.get('timeout')),
+            'skipped': sum(1 for result in results if result.get('cached')),
+            'phases': {
+                name: dict(
+                    stats, seconds=round(stats['seconds'], 4), max_seconds=round(stats['max_seconds'], 4),
+                    rate_wait_seconds=round(stats['rate_wait_seconds'], 4)
+                )
+                for name, stats in self.ordered_phases()
+            },
+            'rate_limits': {
+                host: dict(stats, wait_seconds=round(stats['wait_seconds'], 4),
+                           max_wait_seconds=round(stats['max_wait_seconds'], 4))
+                for host, stats in sorted(self.rate_limits.items())
+            },
+            'per_account': {
+                account: {name: round(seconds, 4) for name, seconds in phases.items()}
+                for account, phases in self.accounts.items()
+            },
+        }
+
+    def to_prometheus(self, results=()):
+        """Prometheus textfile collector格式，账号数量可能很多，只按阶段聚合"""
+        finished = self.finished or time.time()
+        phases = self.ordered_phases()
+        lines = []
+
+        def metric(name, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{value}"' for key, value in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        metric('fnclub_phase_duration_seconds', 'Total time spent in the phase during the last run.',
+               [({'phase': name}, round(stats['seconds'], 6)) for name, stats in phases])
+        metric('fnclub_phase_duration_max_seconds', 'Slowest single execution of the phase during the last run.',
+               [({'phase': name}, round(stats['max_seconds'], 6)) for name, stats in phases])
+        metric('fnclub_phase_calls', 'Executions of the phase during the last run by outcome.',
+               [({'phase': name, 'outcome': outcome}, stats[outcome])
+                for name, stats in phases for outcome in ('success', 'failure')])
+        metric('fnclub_phase_requests', 'HTTP requests sent in the phase during the last run.',
+               [({'phase': name}, stats['requests']) for name, stats in phases])
+        metric('fnclub_phase_retries', 'Retries in the phase during the last run.',
+               [({'phase': name}, stats['retries']) for name, stats in phases])
+        metric('fnclub_phase_response_bytes', 'Response bytes received in the phase during the last run.',
+               [({'phase': name}, stats['bytes']) for name, stats in phases])
+        metric('fnclub_phase_rate_limit_wait_seconds', 'Time spent waiting for the rate limiter in the phase during the last run.',
+               [({'phase': name}, round(stats['rate_wait_seconds'], 6)) for name, stats in phases])
+        rate_limits = sorted(self.rate_limits.items())
+        metric('fnclub_rate_limit_requests', 'Requests that went through the rate limiter during the last run.',
+               [({'host': host}, stats['requests']) for host, stats in rate_limits])
+        metric('fnclub_rate_limit_delayed_requests', 'Requests delayed by the rate limiter during the last run.',
+               [({'host': host}, stats['delayed']) for host, stats in rate_limits])
+        metric('fnclub_rate_limit_wait_seconds', 'Total rate limiter wait during the last run.',
+               [({'host': host}, round(stats['wait_seconds'], 6)) for host, stats in rate_limits])
+        metric('fnclub_rate_limit_wait_max_seconds', 'Longest single rate limiter wait during the last run.',
+               [({'host': host}, round(stats['max_wait_seconds'], 6)) for host, stats in rate_limits])
+        metric('fnclub_run_duration_seconds', 'Wall time of the last run.', [({}, round(finished - self.started, 6))])
+        metric('fnclub_run_accounts', 'Accounts processed in the last run by outcome.', [
+            ({'outcome': 'success'}, sum(1 for result in results if result['success'])),
+            ({'outcome': 'failure'}, sum(1 for result in results if not result['success'])),
+        ])
+        metric('fnclub_run_accounts_skipped', 'Accounts already signed today according to the local ledger.',
+               [({}, sum(1 for result in results if result.get('cached')))])
+        metric('fnclub_run_timestamp_seconds', 'Unix time the last run finished.', [({}, round(finished, 3))])
+        return '\n'.join(lines) + '\n'
+
+    def export(self, results=()):
+        """按配置写入JSON摘要和Prometheus textfile"""
+        if Config.METRICS_JSON:
+            try:
+                atomic_write(Config.METRICS_JSON, json.dumps(self.to_dict(results), ensure_ascii=False, indent=2))
+            except Exception as e:
+                logger.warning("导出JSON统计失败: %s", e)
+        if Config.METRICS_TEXTFILE:
+            try:
+                atomic_write(Config.METRICS_TEXTFILE, self.to_prometheus(results))
+            except Exception as e:
+                logger.warning("导出Prometheus统计失败: %s", e)
+
+
+# inspect.CO_COROUTINE，导入inspect会同时加载ast、dis、tokenize等模块，增加启动耗时
+CO_COROUTINE = 0x80
+
+
+def timed_phase(name):
+    """统计FNSignIn/AsyncFNSignIn方法耗时的装饰器，返回值为假(或返回元组的第一项为假)时记为失败"""
+
+    def succeeded(result):
+        return bool(result[0] if isinstance(result, tuple) else result)
+
+    def decorator(func):
+        if func.__code__.co_flags & CO_COROUTINE:
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                with self.metrics.phase(name, self.username) as outcome:
+                    result = await func(self, *args, **kwargs)
+                    outcome.ok = succeeded(result)
+                    return result
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.phase(name, self.username) as outcome:
+                result = func(self, *args, **kwargs)
+                outcome.ok = succeeded(result)
+                return result
+        return wrapper
+
+    return decorator
+
+
+class RetryPolicy:
+    """统一的重试策略：指数退避加随机抖动，每个操作有独立的尝试次数，所有重试共享同一个截止时间"""
+
+    def __init__(self, deadline=None, log=None):
+        self.deadline = deadline or Deadline()
+        self.logger = log or logger
+
+    def delay(self, retry):
+        """第retry次重试前的等待时间(秒)"""
+        delay = min(Config.RETRY_MAX_DELAY, Config.RETRY_DELAY * 2 ** (retry - 1))
+        return delay * random.uniform(1 - Config.RETRY_JITTER, 1 + Config.RETRY_JITTER)
+
+    def backoff(self, operation, number):
+        """第number次尝试前需要等待的时间(秒)，不应再尝试时返回None"""
+        if number == 1:
+            if self.deadline.expired:
+                self.logger.warning("已超过运行截止时间，跳过%s操作", operation)
+                return None
+            return 0
+        delay = self.delay(number - 1)
+        remaining = self.deadline.remaining()
+        if remaining is not None and remaining <= delay:
+            self.logger.warning("%s操作的重试将超过运行截止时间，停止重试", operation)
+            return None
+        return delay
+
+    def attempts(self, operation):
+        """依次生成每次尝试，两次尝试之间按退避时间等待，等待会超过截止时间时停止重试"""
+        total = Config.RETRY_BUDGETS.get(operation, Config.MAX_RETRIES)
+        for number in range(1, total + 1):
+            delay = self.backoff(operation, number)
+            if delay is None:
+                return
+            if delay:
+                time.sleep(delay)
+            if number > 1:
+                Metrics.count_retry()
+            yield Attempt(number, total)
+
+    async def attempts_async(self, operation):
+        """attempts的异步版本，退避等待时不阻塞事件循环"""
+        total = Config.RETRY_BUDGETS.get(operation, Config.MAX_RETRIES)
+        for number in range(1, total + 1):
+            delay = self.backoff(operation, number)
+            if delay is None:
+                return
+            if delay:
+                import asyncio
+                await asyncio.sleep(delay)
+            if number > 1:
+                Metrics.count_retry()
+            yield Attempt(number, total)
+
+
+class TokenBucket:
+    """令牌桶限流器，线程安全，线程池和asyncio中的请求共享同一个桶
+
+    令牌以rate个/秒的速度补充，最多积累burst个。预留令牌时立即扣减，令牌不足时返回需要等待的时间，
+    调用方按各自的方式（time.sleep或asyncio.sleep）等待，等待期间不持有锁。
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self, max_wait=None):
+        """预留一个令牌，返回需要等待的时间(秒)；需要等待的时间超过max_wait时不预留，返回None"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+            if max_wait is not None and wait > max_wait:
+                return None
+            self.tokens -= 1
+            return wait
+
+
+_rate_limiters = None
+_rate_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(host):
+    """返回域名对应的限流器，未限制的域名返回None"""
+    global _rate_limiters
+    if _rate_limiters is None:
+        with _rate_limiters_lock:
+            if _rate_limiters is None:
+                limiters = {}
+                for url, rate, burst in (
+                    (Config.BASE_URL, Config.FORUM_RATE, Config.FORUM_BURST),
+                    (Config.CAPTCHA_API_URL, Config.OCR_RATE, Config.OCR_BURST),
+                    (Config.TOKEN_URL, Config.OCR_RATE, Config.OCR_BURST),
+                ):
+                    limit_host = urllib.parse.urlsplit(url).hostname
+                    if rate > 0 and limit_host not in limiters:
+                        limiters[limit_host] = TokenBucket(rate, burst)
+                _rate_limiters = limiters
+    return _rate_limiters.get(host)
+
+
+def rate_limit_delay(url, deadline):
+    """为请求预留限流令牌，返回需要等待的时间(秒)；等待会超过截止时间时抛出TimeBudgetExceeded"""
+    host = urllib.parse.urlsplit(url).hostname
+    limiter = get_rate_limiter(host)
+    if limiter is None:
+        return 0.0
+    wait = limiter.reserve(deadline.remaining())
+    if wait is None:
+        raise TimeBudgetExceeded(f"等待{host}的请求限流会超过时间预算")
+    Metrics.count_rate_wait(host, wait)
+    return wait
+
+
+def rate_limit(url, deadline):
+    """按请求的域名限流，令牌不足时阻塞等待"""
+    wait = rate_limit_delay(url, deadline)
+    if wait:
+        time.sleep(wait)
+
+
+_ocr_session = None
+_ocr_session_lock = threading.Lock()
+
+
+def get_ocr_session():
+    """返回进程内所有FNSignIn实例共享的百度OCR客户端，保持长连接，连接池按并发登录数设置"""
+    global _ocr_session
+    if _ocr_session is None:
+        with _ocr_session_lock:
+            if _ocr_session is None:
+                import requests
+                from requests.adapters import HTTPAdapter
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=2, pool_maxsize=Config.OCR_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _ocr_session = session
+    return _ocr_session
+
+
+class CaptchaError(Exception):
+    """验证码识别后端返回的错误"""
+
+
+class CaptchaSolution:
+    """一次验证码识别结果，记录识别文本、置信度、识别后端和原始图片"""
+
+    def __init__(self, text, confidence, solver, image):
+        self.text = text
+        self.confidence = confidence
+        self.solver = solver
+        self.image = image
+
+
+class CaptchaSolver:
+    """验证码识别后端基类，统计调用次数、耗时和识别结果被论坛接受的比例"""
+
+    name = ''
+
     def __init__(self):
+        self.stats_lock = threading.Lock()
+        self.calls = 0
+        self.solved = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.total_time = 0.0
+
+    def available(self):
+        return True
+
+    def solve(self, image, signer):
+        """识别验证码图片，返回(文本, 置信度)，无法识别时返回None，出错时抛出CaptchaError"""
+        raise NotImplementedError
+
+    def timed_solve(self, image, signer):
+        start = time.monotonic()
+        try:
+            result = self.solve(image, signer)
+        finally:
+            with self.stats_lock:
+                self.calls += 1
+                self.total_time += time.monotonic() - start
+        if result:
+            with self.stats_lock:
+                self.solved += 1
+        return result
+
+    def report(self, solution, accepted):
+        """记录识别结果是否被论坛接受"""
+        with self.stats_lock:
+            if accepted:
+                self.accepted += 1
+            else:
+                self.rejected += 1
+
+    def summary(self):
+        with self.stats_lock:
+            avg_ms = self.total_time / self.calls * 1000 if self.calls else 0
+            verified = self.accepted + self.rejected
+            accuracy = f"{self.accepted / verified:.0%}" if verified else '-'
+            return (f"{self.name}: 调用{self.calls}次, 识别出{self.solved}次, 平均耗时{avg_ms:.0f}ms, "
+                    f"正确{self.accepted}次, 错误{self.rejected}次, 准确率{accuracy}")
+
+
+class BaiduOcrSolver(CaptchaSolver):
+    """百度OCR高精度文字识别"""
+
+    name = 'baidu'
+
+    def available(self):
+        return bool(Config.API_KEY and Config.SECRET_KEY)
+
+    def solve(self, image, signer):
+        # 获取access_token
+        access_token = signer.get_access_token()
+        if not access_token:
+            raise CaptchaError("获取百度API access_token失败")
+
+        # 构建API请求URL
+        url = f"{Config.CAPTCHA_API_URL}?access_token={access_token}"
+
+        # 将图片转换为Base64编码，构建请求参数
+        import base64
+        captcha_base64 = base64.b64encode(image).decode('utf-8')
+        payload = f'image={urllib.parse.quote_plus(captcha_base64)}&detect_direction=false&paragraph=false&probability=true'
+
+        # 设置请求头
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': 'application/json'
+        }
+
+        # 发送请求
+        rate_limit(url, signer.retry.deadline)
+        api_response = get_ocr_session().post(
+            url, headers=headers, data=payload.encode("utf-8"), timeout=signer.retry.deadline.timeout()
+        )
+        Metrics.count_request(api_response)
+        if api_response.status_code != 200:
+            raise CaptchaError(f"验证码识别API请求失败，状态码: {api_response.status_code}")
+
+        # 解析API响应
+        result = api_response.json()
+        if 'words_result' in result and len(result['words_result']) > 0:
+            words_result = result['words_result'][0]
+            # 清理验证码文本，移除空格和特殊字符
+            captcha_text = re.sub(r'[\s\W]+', '', words_result['words'])
+            # 开启probability后返回每行文字的平均置信度
+            confidence = words_result.get('probability', {}).get('average')
+            return (captcha_text, confidence) if captcha_text else None
+        elif 'error_code' in result:
+            raise CaptchaError(f"验证码识别API返回错误: {result.get('error_code')}, {result.get('error_msg')}")
+        else:
+            raise CaptchaError(f"验证码识别API返回格式异常: {result}")
+
+
+class LocalCaptchaSolver(CaptchaSolver):
+    """本地模板匹配识别Discuz验证码，只使用CPU，需要安装Pillow和NumPy
+
+    验证码图片二值化后按列投影切分出单个字符，与模板目录中的字符图片逐一计算相关系数，
+    取最相似的模板作为识别结果。模板文件命名为"字符_任意后缀.png"，
+    开启CAPTCHA_LEARN时，其他后端识别正确的验证码会自动切分保存为新模板。
+    """
+
+    name = 'local'
+    # 字符统一缩放到的尺寸(宽, 高)
+    GLYPH_SIZE = (16, 20)
+    # 每个字符最多保存的模板数
+    MAX_TEMPLATES_PER_CHAR = 30
+
+    def __init__(self, template_dir):
+        super().__init__()
+        self.template_dir = template_dir
+        self.templates = []
+        self.template_lock = threading.Lock()
+        try:
+            import numpy
+            from PIL import Image
+        except ImportError:
+            self.np = None
+            self.Image = None
+        else:
+            self.np = numpy
+            self.Image = Image
+            self.load_templates()
+
+    def available(self):
+        return self.np is not None and bool(self.templates)
+
+    def load_templates(self):
+        if not os.path.isdir(self.template_dir):
+            return
+        for filename in sorted(os.listdir(self.template_dir)):
+            char, _, ext = filename.partition('_')
+            if len(char) != 1 or not filename.lower().endswith('.png'):
+                continue
+            try:
+                with self.Image.open(os.path.join(self.template_dir, filename)) as image:
+                    glyph = self.np.asarray(image.convert('L'), dtype=self.np.uint8) > 127
+                self.templates.append((char.upper(), self.vectorize(glyph)))
+            except Exception as e:
+                logger.warning("加载验证码模板%s失败: %s", filename, e)
+        logger.debug("已加载%s个验证码模板", len(self.templates))
+
+    def vectorize(self, glyph):
+        """将字符二值图缩放到统一尺寸并归一化，便于计算相关系数"""
+        np = self.np
+        image = self.Image.fromarray(glyph.astype(np.uint8) * 255).resize(self.GLYPH_SIZE, self.Image.BILINEAR)
+        vector = np.asarray(image, dtype=np.float32).ravel()
+        vector -= vector.mean()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def segment(self, image):
+        """二值化验证码图片并切分出每个字符的二值图"""
+        np = self.np
+        import io
+        with self.Image.open(io.BytesIO(image)) as img:
+            gray = np.asarray(img.convert('L'), dtype=np.uint8)
+
+        # Otsu阈值二值化，字符为较暗的前景
+        hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+        total = gray.size
+        weight = np.cumsum(hist)
+        mean = np.cumsum(hist * np.arange(256))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variance = (mean[-1] * weight / total - mean) ** 2 / (weight * (total - weight))
+        threshold = int(np.nanargmax(variance))
+        mask = gray <= threshold
+
+        # 去除周围8个像素都不是前景的孤立噪点
+        padded = np.pad(mask, 1).astype(np.uint8)
+        height, width = mask.shape
+        neighbors = sum(
+            padded[1 + dy:1 + dy + height, 1 + dx:1 + dx + width]
+            for dy in (-1, 0, 1) for dx in (-1, 0, 1) if dy or dx
+        )
+        mask &= neighbors > 0
+
+        # 按列投影切分，忽略只有零星噪点的列
+        columns = mask.sum(axis=0) >= 2
+        segments = []
+        start = None
+        for x, filled in enumerate(columns):
+            if filled and start is None:
+                start = x
+            elif not filled and start is not None:
+                segments.append([start, x])
+                start = None
+        if start is not None:
+            segments.append([start, len(columns)])
+        segments = [seg for seg in segments if seg[1] - seg[0] >= 2]
+
+        # 调整到验证码长度：合并间隔最近的片段，或拆分最宽的片段
+        length = Config.CAPTCHA_LENGTH
+        while len(segments) > length:
+            gaps = [segments[i + 1][0] - segments[i][1] for i in range(len(segments) - 1)]
+            i = gaps.index(min(gaps))
+            segments[i:i + 2] = [[segments[i][0], segments[i + 1][1]]]
+        while segments and len(segments) < length:
+            widths = [seg[1] - seg[0] for seg in segments]
+            i = widths.index(max(widths))
+            if widths[i] < 4:
+                break
+            middle = segments[i][0] + widths[i] // 2
+            segments[i:i + 1] = [[segments[i][0], middle], [middle, segments[i][1]]]
+        if len(segments) != length:
+            return []
+
+        glyphs = []
+        for left, right in segments:
+            part = mask[:, left:right]
+            rows = np.nonzero(part.any(axis=1))[0]
+            glyphs.append(part[rows[0]:rows[-1] + 1])
+        return glyphs
+
+    def solve(self, image, signer):
+        glyphs = self.segment(image)
+        if not glyphs:
+            return None
+
+        with self.template_lock:
+            templates = list(self.templates)
+        chars = []
+        scores = []
+        for glyph in glyphs:
+            vector = self.vectorize(glyph)
+            score, char = max((float(vector @ template), char) for char, template in templates)
+            chars.append(char)
+            scores.append(score)
+
+        confidence = min(scores)
+        if confidence < Config.CAPTCHA_LOCAL_MIN_SCORE:
+            logger.debug("本地识别结果%s置信度%.2f过低", ''.join(chars), confidence)
+            return None
+        return ''.join(chars), confidence
+
+    def learn(self, image, text):
+        """将识别正确的验证码切分后保存为字符模板"""
+        if self.np is None:
+            return
+        glyphs = self.segment(image)
+        if len(glyphs) != len(text):
+            return
+        os.makedirs(self.template_dir, exist_ok=True)
+        with self.template_lock:
+            for char, glyph in zip(text.upper(), glyphs):
+                if sum(1 for c, _ in self.templates if c == char) >= self.MAX_TEMPLATES_PER_CHAR:
+                    continue
+                import hashlib
+                filename = f"{char}_{hashlib.md5(glyph.tobytes()).hexdigest()[:8]}.png"
+                self.Image.fromarray(glyph.astype(self.np.uint8) * 255).save(os.path.join(self.template_dir, filename))
+                self.templates.append((char, self.vectorize(glyph)))
+
+
+class CaptchaSolverChain:
+    """按配置顺序依次尝试各个验证码识别后端，前一个无法识别或出错时使用下一个"""
+
+    SOLVERS = {
+        'local': lambda: LocalCaptchaSolver(Config.CAPTCHA_TEMPLATE_DIR),
+        'baidu': BaiduOcrSolver,
+    }
+
+    def __init__(self, names):
+        self.solvers = []
+        for name in names:
+            if name not in self.SOLVERS:
+                logger.warning("未知的验证码识别后端: %s", name)
+                continue
+            self.solvers.append(self.SOLVERS[name]())
+
+    def solve(self, image, signer):
+        """返回第一个识别成功的CaptchaSolution，全部失败时返回None"""
+        for solver in self.solvers:
+            if not solver.available():
+                continue
+            try:
+                result = solver.timed_solve(image, signer)
+            except Exception as e:
+                signer.logger.warning("验证码识别后端%s出错: %s", solver.name, e)
+                continue
+            if result:
+                text, confidence = result
+                return CaptchaSolution(text, confidence, solver, image)
+        return None
+
+    def race(self, image, signer):
+        """所有可用后端同时识别，返回第一个置信度达标的结果；都不达标时返回置信度最高的结果"""
+        solvers = [solver for solver in self.solvers if solver.available()]
+        if len(solvers) <= 1:
+            return self.solve(image, signer)
+
+        executor = get_background_executor()
+        # 复制当前上下文，后台线程中的请求也计入当前统计阶段
+        pending = {
+            executor.submit(contextvars.copy_context().run, solver.timed_solve, image, signer): solver
+            for solver in solvers
+        }
+        candidates = []
+        while pending:
+            done, _ = wait(pending, timeout=signer.retry.deadline.remaining(), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                solver = pending.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    signer.logger.warning("验证码识别后端%s出错: %s", solver.name, e)
+                    continue
+                if not result:
+                    continue
+                text, confidence = result
+                solution = CaptchaSolution(text, confidence, solver, image)
+                if confidence is not None and confidence >= Config.CAPTCHA_MIN_CONFIDENCE:
+                    return solution
+                candidates.append(solution)
+
+        if not candidates:
+            return None
+        return max(candidates, key=lambda solution: solution.confidence or 0)
+
+    def report(self, solution, accepted):
+        """记录识别结果是否正确，正确的结果用于训练本地模板"""
+        solution.solver.report(solution, accepted)
+        if accepted and Config.CAPTCHA_LEARN:
+            for solver in self.solvers:
+                if isinstance(solver, LocalCaptchaSolver) and solver is not solution.solver:
+                    try:
+                        solver.learn(solution.image, solution.text)
+                    except Exception as e:
+                        logger.warning("保存验证码模板失败: %s", e)
+
+    def summary(self):
+        return [solver.summary() for solver in self.solvers if solver.calls]
+
+
+_background_executor = None
+_captcha_chain = None
+_captcha_chain_lock = threading.Lock()
+
+
+def get_background_executor():
+    """返回进程内共享的后台线程池，用于预先下载验证码和并行识别验证码"""
+    global _background_executor
+    if _background_executor is None:
+        with _captcha_chain_lock:
+            if _background_executor is None:
+                _background_executor = ThreadPoolExecutor(
+                    max_workers=max(4, Config.MAX_WORKERS * 2), thread_name_prefix='fn_captcha'
+                )
+    return _background_executor
+
+
+def get_captcha_chain():
+    """返回进程内共享的验证码识别链，各后端的统计数据在所有账号间累计"""
+    global _captcha_chain
+    if _captcha_chain is None:
+        with _captcha_chain_lock:
+            if _captcha_chain is None:
+                names = [name.strip() for name in Config.CAPTCHA_SOLVERS.split(',') if name.strip()]
+                _captcha_chain = CaptchaSolverChain(names)
+    return _captcha_chain
+
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """跨进程的排他文件锁"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'a+') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def atomic_write(path, content):
+    """先写入同目录下的临时文件再重命名，保证其他进程不会读到写了一半的文件"""
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    import tempfile
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class TokenProvider:
+    """百度OCR的access_token提供者
+
+    token缓存在进程内存中，磁盘缓存通过临时文件加重命名原子写入；刷新token时持有跨进程文件锁，
+    多个进程同时发现token过期时只有一个会请求oauth/2.0/token，其余进程等待后直接读取新的缓存。
+    token临近过期时在后台线程中提前刷新，登录时无需等待。
+    """
+
+    def __init__(self, cache_file):
+        self.cache_file = cache_file
+        self.lock_file = cache_file + '.lock'
+        self.access_token = None
+        self.expires_time = 0
+        self.lock = threading.Lock()
+        self.refreshing = False
+        self.refreshing_lock = threading.Lock()
+
+    def valid(self):
+        return bool(self.access_token) and self.expires_time > time.time()
+
+    def get(self, retry):
+        """返回有效的access_token，获取失败时返回None"""
+        if not self.valid():
+            with self.lock:
+                if not self.valid():
+                    self.refresh(retry)
+
+        if self.valid() and self.expires_time - time.time() < Config.TOKEN_REFRESH_AHEAD:
+            self.refresh_in_background()
+        return self.access_token if self.valid() else None
+
+    def load(self):
+        """读取磁盘缓存，缓存有效时返回True"""
+        if not os.path.exists(self.cache_file):
+            return False
+        try:
+            with open(self.cache_file, 'r') as f:
+                token_data = json.load(f)
+        except Exception as e:
+            logger.warning("读取token缓存文件失败: %s", e)
+            return False
+        # 检查token是否过期（百度token有效期为30天）
+        if token_data.get('expires_time', 0) > time.time() and token_data.get('access_token'):
+            self.access_token = token_data['access_token']
+            self.expires_time = token_data['expires_time']
+            return True
+        return False
+
+    def refresh(self, retry, force=False):
+        """持有跨进程文件锁刷新token，其他进程已刷新时直接使用其结果"""
+        if not force and self.load():
+            logger.info("使用缓存的access_token")
+            return True
+
+        with file_lock(self.lock_file):
+            # 等待锁期间其他进程可能已经刷新了token
+            if self.load() and (not force or self.expires_time - time.time() >= Config.TOKEN_REFRESH_AHEAD):
+                logger.info("使用其他进程刷新的access_token")
+                return True
+            return self.fetch(retry)
+
+    def fetch(self, retry):
+        """请求新的access_token并原子写入磁盘缓存"""
+        params = {
+            "grant_type": "client_credentials",
+            "client_id": Config.API_KEY,
+            "client_secret": Config.SECRET_KEY
+        }
+        for attempt in retry.attempts('token'):
+            try:
+                rate_limit(Config.TOKEN_URL, retry.deadline)
+                response = get_ocr_session().post(Config.TOKEN_URL, params=params, timeout=retry.deadline.timeout())
+                Metrics.count_request(response)
+                if response.status_code != 200:
+                    retry.logger.error("获取access_token失败，状态码: %s，重试(%s)", response.status_code, attempt)
+                    continue
+                result = response.json()
+                if not result.get("access_token"):
+                    retry.logger.error("获取access_token失败: %s，重试(%s)", result.get('error_description', result), attempt)
+                    continue
+
+                expires_in = result.get("expires_in", 2592000)  # 默认30天
+                self.access_token = str(result["access_token"])
+                self.expires_time = time.time() + expires_in - 86400  # 提前一天过期
+                try:
+                    atomic_write(self.cache_file, json.dumps({
+                        'access_token': self.access_token,
+                        'expires_time': self.expires_time
+                    }))
+                    retry.logger.info("access_token已缓存")
+                except Exception as e:
+                    retry.logger.warning("缓存access_token失败: %s", e)
+                return True
+            except Exception as e:
+                retry.logger.error("获取access_token请求异常: %s，重试(%s)", e, attempt)
+
+        retry.logger.error("获取access_token失败，重试次数已用尽")
+        return False
+
+    def refresh_in_background(self):
+        """token临近过期时在后台线程中提前刷新"""
+        with self.refreshing_lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        def worker():
+            try:
+                self.refresh(RetryPolicy(), force=True)
+            except Exception as e:
+                logger.warning("后台刷新access_token失败: %s", e)
+            finally:
+                self.refreshing = False
+
+        threading.Thread(target=worker, name='fn_token_refresh', daemon=True).start()
+
+
+_token_provider = None
+
+
+def get_token_provider():
+    """返回进程内共享的access_token提供者"""
+    global _token_provider
+    if _token_provider is None:
+        with _captcha_chain_lock:
+            if _token_provider is None:
+                _token_provider = TokenProvider(Config.TOKEN_CACHE_FILE)
+    return _token_provider
+
+
+class SqliteStore:
+    """保存在本地数据库(DATA_DB)中的数据表
+
+    数据库使用WAL模式，多个线程和进程可以同时读写，每个线程使用独立的连接。子类通过SCHEMA定义数据表。
+    """
+
+    SCHEMA = ''
+
+    def __init__(self, path):
+        self.path = path
+        self.local = threading.local()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with self.connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def connect(self):
+        """返回当前线程的数据库连接，sqlite3连接不能跨线程使用"""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            import sqlite3
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self.local.conn = conn
+        return conn
+
+    @contextlib.contextmanager
+    def transaction(self):
+        """写事务，BEGIN IMMEDIATE在开始时就获取写锁，避免并发写入时升级锁失败"""
+        conn = self.connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+
+class CookieStore(SqliteStore):
+    """基于SQLite的Cookie存储
+
+    所有账号的Cookie保存在同一个数据库中，按(账号, 域名, 路径, 名称)建立主键索引，保留过期时间、
+    secure和HttpOnly等完整属性。每次保存在一个事务中整体替换该账号的Cookie，不会出现写了一半的状态。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cookies (
+            account TEXT NOT NULL,
+            domain TEXT NOT NULL,
+            path TEXT NOT NULL,
+            name TEXT NOT NULL,
+            value TEXT,
+            expires INTEGER,
+            secure INTEGER NOT NULL DEFAULT 0,
+            rest TEXT,
+            updated REAL NOT NULL,
+            PRIMARY KEY (account, domain, path, name)
+        ) WITHOUT ROWID
+    """
+
+    def has(self, account):
+        row = self.connect().execute('SELECT 1 FROM cookies WHERE account = ? LIMIT 1', (account,)).fetchone()
+        return row is not None
+
+    def load(self, account):
+        """返回账号未过期的Cookie列表"""
+        from requests.cookies import create_cookie
+        rows = self.connect().execute(
+            'SELECT name, value, domain, path, expires, secure, rest FROM cookies '
+            'WHERE account = ? AND (expires IS NULL OR expires > ?)',
+            (account, int(time.time()))
+        ).fetchall()
+        return [
+            create_cookie(
+                name, value, domain=domain, path=path, expires=expires,
+                secure=bool(secure), rest=json.loads(rest) if rest else {}
+            )
+            for name, value, domain, path, expires, secure, rest in rows
+        ]
+
+    def save(self, account, cookies):
+        """在一个事务中替换账号的全部Cookie"""
+        now = time.time()
+        rows = [
+            (
+                account, cookie.domain, cookie.path, cookie.name, cookie.value, cookie.expires,
+                int(bool(cookie.secure)), json.dumps(cookie._rest) if cookie._rest else None, now
+            )
+            for cookie in cookies
+        ]
+        with self.transaction() as conn:
+            conn.execute('DELETE FROM cookies WHERE account = ?', (account,))
+            conn.executemany(
+                'INSERT OR REPLACE INTO cookies (account, domain, path, name, value, expires, secure, rest, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+
+    def migrate(self, account, cookie_file):
+        """将旧版本的JSON Cookie文件导入数据库，返回导入的Cookie数量"""
+        from requests.cookies import create_cookie
+        with open(cookie_file, 'r') as f:
+            cookies_list = json.load(f)
+
+        if isinstance(cookies_list, list):
+            # 新格式：包含完整Cookie属性的列表
+            cookies = [
+                create_cookie(
+                    item['name'], item['value'], domain=item.get('domain') or '', path=item.get('path') or '/',
+                    expires=item.get('expires'), secure=item.get('secure', False)
+                )
+                for item in cookies_list if 'name' in item
+            ]
+        else:
+            # 旧格式：简单的名称-值字典
+            cookies = [create_cookie(name, value) for name, value in cookies_list.items()]
+
+        with self.transaction() as conn:
+            # 其他进程可能已经完成了迁移
+            if conn.execute('SELECT 1 FROM cookies WHERE account = ? LIMIT 1', (account,)).fetchone():
+                return 0
+            now = time.time()
+            conn.executemany(
+                'INSERT OR REPLACE INTO cookies (account, domain, path, name, value, expires, secure, rest, updated) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                [
+                    (account, cookie.domain, cookie.path, cookie.name, cookie.value, cookie.expires,
+                     int(bool(cookie.secure)), None, now)
+                    for cookie in cookies
+                ]
+            )
+        return len(cookies)
+
+
+_cookie_store = None
+_cookie_store_lock = threading.Lock()
+
+
+def get_cookie_store():
+    """返回进程内共享的Cookie存储"""
+    global _cookie_store
+    if _cookie_store is None:
+        with _cookie_store_lock:
+            if _cookie_store is None:
+                _cookie_store = CookieStore(Config.DATA_DB)
+    return _cookie_store
+
+
+def site_today():
+    """论坛当前的签到日期"""
+    return datetime.now(timezone(timedelta(hours=Config.SITE_UTC_OFFSET))).date()
+
+
+class SignLedger(SqliteStore):
+    """本地签到记录
+
+    按(账号, 日期)记录已确认"今日已打卡"的账号和当时的签到信息，同一天再次运行时直接使用记录，
+    无需访问论坛。日期按论坛的时区计算，到论坛的零点后自动失效。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sign_ledger (
+            account TEXT NOT NULL,
+            day TEXT NOT NULL,
+            signed_at REAL NOT NULL,
+            sign_info TEXT,
+            PRIMARY KEY (account, day)
+        ) WITHOUT ROWID
+    """
+
+    def signed(self, day):
+        """返回指定日期已签到账号的签到信息 {账号: 签到信息}"""
+        rows = self.connect().execute(
+            'SELECT account, sign_info FROM sign_ledger WHERE day = ?', (day.isoformat(),)
+        ).fetchall()
+        return {account: json.loads(sign_info) if sign_info else {} for account, sign_info in rows}
+
+    def record(self, day, results):
+        """记录签到成功的账号"""
+        now = time.time()
+        rows = [
+            (result['username'], day.isoformat(), now, json.dumps(result['sign_info'], ensure_ascii=False))
+            for result in results if result['success']
+        ]
+        if not rows:
+            return
+        with self.transaction() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO sign_ledger (account, day, signed_at, sign_info) VALUES (?, ?, ?, ?)', rows
+            )
+
+
+_sign_ledger = None
+_sign_ledger_lock = threading.Lock()
+
+
+def get_sign_ledger():
+    """返回进程内共享的签到记录"""
+    global _sign_ledger
+    if _sign_ledger is None:
+        with _sign_ledger_lock:
+            if _sign_ledger is None:
+                _sign_ledger = SignLedger(Config.DATA_DB)
+    return _sign_ledger
+
+
+class SignHistory(SqliteStore):
+    """签到历史
+
+    每次签到成功后解析到的"我的打卡动态"按账号追加保存，只插入不修改。常用字段保存为独立的列，
+    其余字段以JSON保存在rest列中；表按(账号, 记录时间)聚簇存储，按账号查询时只读取该账号的记录。
+    报表和统计直接查询本地数据，无需再次访问论坛。
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sign_history (
+            account TEXT NOT NULL,
+            recorded REAL NOT NULL,
+            sign_day TEXT,
+            last_sign TEXT,
+            month_days INTEGER,
+            streak_days INTEGER,
+            total_days INTEGER,
+            level TEXT,
+            rest TEXT,
+            PRIMARY KEY (account, recorded)
+        ) WITHOUT ROWID
+    """
+
+    # "我的打卡动态"中的字段和对应的列
+    FIELDS = {
+        '最近打卡': 'last_sign',
+        '本月打卡': 'month_days',
+        '连续打卡': 'streak_days',
+        '累计打卡': 'total_days',
+        '当前打卡等级': 'level',
+    }
+    NUMBER_COLUMNS = ('month_days', 'streak_days', 'total_days')
+
+    @classmethod
+    def parse(cls, sign_info):
+        """将签到信息转换为各列的值"""
+        row = {column: None for column in cls.FIELDS.values()}
+        rest = {}
+        for key, value in sign_info.items():
+            column = cls.FIELDS.get(key)
+            if column is None:
+                rest[key] = value
+            elif column in cls.NUMBER_COLUMNS:
+                match = re.search(r'\d+', value)
+                row[column] = int(match.group()) if match else None
+            else:
+                row[column] = value
+        # 最近打卡时间中的日期即为该次记录确认的签到日期
+        match = re.search(r'(\d{4})-(\d{1,2})-(\d{1,2})', row['last_sign'] or '')
+        row['sign_day'] = datetime(*map(int, match.groups())).date().isoformat() if match else None
+        row['rest'] = json.dumps(rest, ensure_ascii=False) if rest else None
+        return row
+
+    def append(self, results):
+        """追加签到成功且获取到签到信息的账号的记录"""
+        now = time.time()
+        rows = []
+        for result in results:
+            if not result['success'] or not result['sign_info']:
+                continue
+            row = self.parse(result['sign_info'])
+            rows.append((
+                result['username'], now, row['sign_day'], row['last_sign'], row['month_days'],
+                row['streak_days'], row['total_days'], row['level'], row['rest']
+            ))
+        if not rows:
+            return
+        with self.transaction() as conn:
+            conn.executemany(
+                'INSERT OR IGNORE INTO sign_history (account, recorded, sign_day, last_sign, month_days, '
+                'streak_days, total_days, level, rest) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+
+    def accounts(self):
+        return [row[0] for row in self.connect().execute('SELECT DISTINCT account FROM sign_history ORDER BY account')]
+
+    def records(self, account):
+        """按时间顺序返回账号的所有记录"""
+        cursor = self.connect().execute(
+            'SELECT recorded, sign_day, last_sign, month_days, streak_days, total_days, level, rest '
+            'FROM sign_history WHERE account = ? ORDER BY recorded',
+            (account,)
+        )
+        columns = [item[0] for item in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor]
+
+    def latest(self, account):
+        """账号最近一次的记录，没有记录时返回None"""
+        records = self.records(account)
+        return records[-1] if records else None
+
+    def sign_days(self, account, start=None, end=None):
+        """账号已签到的日期列表
+
+        每条记录的最近打卡日期及其之前连续打卡天数内的日期都视为已签到，因此没有运行脚本的日期
+        只要论坛的连续打卡未中断也会计入。
+        """
+        days = set()
+        for record in self.records(account):
+            if not record['sign_day']:
+                continue
+            last = datetime.strptime(record['sign_day'], '%Y-%m-%d').date()
+            for offset in range(max(record['streak_days'] or 1, 1)):
+                days.add(last - timedelta(days=offset))
+        return sorted(day for day in days if (start is None or day >= start) and (end is None or day <= end))
+
+    @staticmethod
+    def streaks(days):
+        """将有序的日期列表合并为连续签到区间[(开始日期, 结束日期)]"""
+        streaks = []
+        for day in days:
+            if streaks and day - streaks[-1][1] == timedelta(days=1):
+                streaks[-1][1] = day
+            else:
+                streaks.append([day, day])
+        return [tuple(item) for item in streaks]
+
+    @staticmethod
+    def gaps(days):
+        """有序的日期列表中未签到的区间[(开始日期, 结束日期)]"""
+        return [
+            (previous + timedelta(days=1), day - timedelta(days=1))
+            for previous, day in zip(days, days[1:]) if day - previous > timedelta(days=1)
+        ]
+
+    @staticmethod
+    def monthly_totals(days):
+        """每月的签到天数 {'YYYY-MM': 天数}"""
+        totals = {}
+        for day in days:
+            month = day.strftime('%Y-%m')
+            totals[month] = totals.get(month, 0) + 1
+        return totals
+
+    def report(self, account, start=None, end=None):
+        """账号的签到统计：签到天数、当前和最长连续签到、未签到区间、每月签到天数以及论坛最近一次的数据"""
+        days = self.sign_days(account, start, end)
+        streaks = self.streaks(days)
+        today = site_today()
+        current = streaks[-1] if streaks and streaks[-1][1] >= today - timedelta(days=1) else None
+        longest = max(streaks, key=lambda item: (item[1] - item[0], item[1]), default=None)
+        latest = self.latest(account)
+
+        def span(item):
+            return {'start': item[0].isoformat(), 'end': item[1].isoformat(), 'days': (item[1] - item[0]).days + 1}
+
+        return {
+            'account': account,
+            'first_day': days[0].isoformat() if days else None,
+            'last_day': days[-1].isoformat() if days else None,
+            'sign_days': len(days),
+            'current_streak': span(current)['days'] if current else 0,
+            'longest_streak': span(longest) if longest else None,
+            'gaps': [span(item) for item in self.gaps(days)],
+            'monthly': self.monthly_totals(days),
+            'latest': {
+                key: latest[column] for key, column in self.FIELDS.items()
+            } if latest else {},
+        }
+
+
+_sign_history = None
+_sign_history_lock = threading.Lock()
+
+
+def get_sign_history():
+    """返回进程内共享的签到历史"""
+    global _sign_history
+    if _sign_history is None:
+        with _sign_history_lock:
+            if _sign_history is None:
+                _sign_history = SignHistory(Config.DATA_DB)
+    return _sign_history
+
+
+_parser_backend = None
+
+
+def get_parser_backend():
+    """返回使用的HTML解析后端，配置的解析器未安装时回退到html.parser"""
+    global _parser_backend
+    if _parser_backend is None:
+        if Config.HTML_PARSER == 'auto':
+            candidates = ['selectolax', 'lxml']
+        else:
+            candidates = [Config.HTML_PARSER]
+
+        backend = 'html.parser'
+        for name in candidates:
+            if name == 'html.parser' or importlib.util.find_spec(name) is not None:
+                backend = name
+                break
+            if Config.HTML_PARSER == 'auto':
+                logger.debug("HTML解析器%s未安装", name)
+            else:
+                logger.warning("HTML解析器%s未安装，回退到html.parser", name)
+        logger.debug("使用HTML解析器: %s", backend)
+        _parser_backend = backend
+    return _parser_backend
+
+
+class HtmlNode:
+    """HTML节点的统一封装，屏蔽BeautifulSoup和selectolax的接口差异"""
+
+    def __init__(self, node, lexbor=False):
+        self.node = node
+        self.lexbor = lexbor
+
+    def select_one(self, selector):
+        if self.lexbor:
+            node = self.node.css_first(selector)
+        else:
+            node = self.node.select_one(selector)
+        return HtmlNode(node, self.lexbor) if node is not None else None
+
+    def select(self, selector):
+        nodes = self.node.css(selector) if self.lexbor else self.node.select(selector)
+        return [HtmlNode(node, self.lexbor) for node in nodes]
+
+    def get(self, name, default=None):
+        if self.lexbor:
+            value = self.node.attributes.get(name)
+        else:
+            value = self.node.get(name)
+        return default if value is None else value
+
+    def text(self, strip=False):
+        if self.lexbor:
+            return self.node.text(strip=strip)
+        return self.node.get_text(strip=strip)
+
+
+class HtmlDoc(HtmlNode):
+    """按配置的解析后端解析HTML文档
+
+    parse_only为SoupStrainer的参数，使用BeautifulSoup时只构建目标元素及其子元素，
+    selectolax本身解析足够快，忽略该参数。
+    """
+
+    def __init__(self, html, parse_only=None):
+        backend = get_parser_backend()
+        if backend == 'selectolax':
+            from selectolax.lexbor import LexborHTMLParser
+            super().__init__(LexborHTMLParser(html), lexbor=True)
+        else:
+            from bs4 import BeautifulSoup, SoupStrainer
+            strainer = SoupStrainer(**parse_only) if parse_only else None
+            super().__init__(BeautifulSoup(html, backend, parse_only=strainer))
+
+
+class SignPage:
+    """签到页面模型，一次解析得到签到按钮文本、sign参数和"我的打卡动态"信息"""
+
+    # 签到信息区域所在的div.bm起始标签
+    BM_DIV_PATTERN = re.compile(r'<div[^>]*class="bm[\s"]')
+
+    def __init__(self, html):
+        self.sign_text = None
+        self.sign_param = None
+        self.sign_info = {}
+
+        # 页面脚本中的当前用户UID，未登录时为0
+        match = re.search(r"discuz_uid\s*=\s*'(\d+)'", html)
+        self.uid = int(match.group(1)) if match else 0
+
+        # 快速路径：只解析签到按钮和签到信息所在的片段
+        fragment = self.extract_fragment(html)
+        if fragment:
+            self.parse(HtmlDoc(fragment))
+
+        # 片段中没有解析到页面上存在的元素时，回退到解析整个页面
+        if ('signbtn' in html and not self.sign_text) or ('我的打卡动态' in html and not self.sign_info):
+            self.parse(HtmlDoc(html, parse_only={'class_': ['signbtn', 'bm']}))
+
+    @classmethod
+    def extract_fragment(cls, html):
+        """截取签到按钮和"我的打卡动态"区域的HTML片段"""
+        parts = []
+        pos = html.find('signbtn')
+        if pos != -1:
+            start = html.rfind('<', 0, pos)
+            end = html.find('</a>', pos)
+            if end != -1:
+                parts.append(html[start:end + 4])
+
+        pos = html.find('我的打卡动态')
+        if pos != -1:
+            start = None
+            for match in cls.BM_DIV_PATTERN.finditer(html, 0, pos):
+                start = match.start()
+            end = html.find('</ul>', pos)
+            if start is not None and end != -1:
+                parts.append(html[start:end + 5])
+        return ''.join(parts)
+
+    def parse(self, doc):
+        # 查找签到按钮，获取签到链接和状态
+        sign_btn = doc.select_one('.signbtn .btna')
+        if sign_btn:
+            self.sign_text = sign_btn.text().strip()
+            sign_link = sign_btn.get('href')
+            # 提取sign参数
+            if sign_link:
+                match = re.search(r'sign=([^&]+)', sign_link)
+                if match:
+                    self.sign_param = match.group(1)
+
+        # 查找签到信息区域
+        for div in doc.select('div.bm'):
+            header = div.select_one('div.bm_h')
+            if header and '我的打卡动态' in header.text():
+                # 解析签到信息列表
+                for item in div.select('div.bm_c li'):
+                    text = item.text(strip=True)
+                    if '：' in text:
+                        key, value = text.split('：', 1)
+                        self.sign_info[key] = value
+                break
+
+
+class LoginPage:
+    """登录页面模型，解析登录表单、formhash、输入框ID和验证码信息"""
+
+    def __init__(self, html):
+        # 快速路径：只解析第一个表单到最后一个表单之间的片段
+        start = html.find('<form')
+        end = html.rfind('</form>')
+        if start != -1 and end > start:
+            self.parse(HtmlDoc(html[start:end + 7]))
+            if self.form_found and self.formhash:
+                return
+
+        # 回退到解析整个页面中的表单、输入框和图片
+        self.parse(HtmlDoc(html, parse_only={'name': ['form', 'input', 'img']}))
+
+    def parse(self, doc):
+        self.form_id = ''
+        self.form_action = ''
+        self.login_hash = ''
+        self.fallback_form = False
+        self.formhash = None
+        self.username_id = ''
+        self.password_id = ''
+        self.seccode_id = None
+        self.captcha_src = None
+
+        # 获取登录表单信息
+        forms = doc.select('form')
+        login_form = None
+        for form in forms:
+            form_id = form.get('id', '')
+            if form_id and ('loginform' in form_id or 'lsform' in form_id):
+                login_form = form
+                break
+            elif form.get('name') == 'login':
+                login_form = form
+                break
+            elif form.get('action') and 'logging' in form.get('action'):
+                login_form = form
+                break
+
+        if not login_form and forms:
+            # 尝试查找任何表单，可能是登录表单
+            login_form = forms[0]
+            self.fallback_form = True
+
+        self.form_found = login_form is not None
+        if login_form:
+            # 提取登录表单ID中的随机部分
+            self.form_id = login_form.get('id', '')
+            self.login_hash = self.form_id.split('_')[-1] if '_' in self.form_id else ''
+            self.form_action = login_form.get('action', '')
+
+        # 获取表单字段
+        formhash = doc.select_one('input[name="formhash"]')
+        if formhash:
+            self.formhash = formhash.get('value')
+
+        # 获取用户名和密码输入框ID
+        username_input = doc.select_one('input[name="username"]')
+        self.username_id = username_input.get('id', '') if username_input else ''
+        password_input = doc.select_one('input[name="password"]')
+        self.password_id = password_input.get('id', '') if password_input else ''
+
+        # 检查是否需要验证码
+        seccodeverify = doc.select_one('input[name="seccodeverify"]')
+        if seccodeverify:
+            self.seccode_id = seccodeverify.get('id', '').replace('seccodeverify_', '')
+            captcha_img = doc.select_one('img[src*="misc.php?mod=seccode"]')
+            if captcha_img:
+                self.captcha_src = captcha_img.get('src')
+
+    @property
+    def needs_seccode(self):
+        return self.seccode_id is not None
+
+    @staticmethod
+    def find_captcha_url(html):
+        """不解析页面，直接从登录页面中找出验证码图片的地址，用于提前下载验证码"""
+        match = re.search(r'src="(misc\.php\?mod=seccode[^"]*)"', html)
+        return Config.BASE_URL + unescape(match.group(1)) if match else None
+
+    def login_data(self, username, password):
+        """构建登录请求的表单数据"""
+        data = {
+            'formhash': self.formhash,
+            'referer': Config.BASE_URL,
+            'loginfield': 'username',
+            'username': username,
+            'password': password,
+            'questionid': '0',
+            'answer': '',
+            'cookietime': '2592000',  # 保持登录状态30天
+            'loginsubmit': 'true'
+        }
+        # 添加特定的表单字段
+        if self.username_id:
+            data[self.username_id] = username
+        if self.password_id:
+            data[self.password_id] = password
+        if self.needs_seccode:
+            # 添加验证码ID到登录数据，验证码在提交登录时识别
+            data['seccodehash'] = self.seccode_id
+        return data
+
+
+class FNSignIn:
+    HEADERS = {
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
+    }
+    # 提交登录表单时附加的请求头，模拟真实浏览器
+    LOGIN_HEADERS = {
+        'Origin': Config.BASE_URL.rstrip('/'),
+        'Referer': Config.LOGIN_URL,
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Upgrade-Insecure-Requests': '1'
+    }
+    LOGIN_SUBMIT_URL = f"{Config.LOGIN_URL}&loginsubmit=yes&inajax=1"
+
+    def __init__(self, username=None, password=None, cookie_file=None):
+        self.username = Config.USERNAME if username is None else username
+        self.password = Config.PASSWORD if password is None else password
+
+        # 旧版本的Cookie文件，仅用于首次运行时迁移到Cookie数据库
+        if cookie_file is None:
+            if self.username == Config.USERNAME:
+                cookie_file = Config.COOKIE_FILE
+            else:
+                safe_name = re.sub(r'[\\/:*?"<>|\s]', '_', self.username)
+                cookie_file = os.path.join(Config.COOKIE_DIR, f'{safe_name}.json')
+        self.cookie_file = cookie_file
+
+        self.logger = AccountLogger(logger, {'account': self.username})
+        # 本次运行中解析过的签到页面
+        self.sign_page = None
+        self.retry = RetryPolicy(log=self.logger)
+        self.metrics = Metrics()
+        import requests
         self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8'
-        })
+        self.session.headers.update(self.HEADERS)
         self.load_cookies()
     
     def load_cookies(self):
-        """从文件加载Cookie"""
-        if os.path.exists(Config.COOKIE_FILE):
-            try:
-                with open(Config.COOKIE_FILE, 'r') as f:
-                    cookies_list = json.load(f)
-                    
-                    # 检查是否为新格式的Cookie列表
-                    if isinstance(cookies_list, list) and len(cookies_list) > 0 and 'name' in cookies_list[0]:
-                        # 新格式：包含完整Cookie属性的列表
-                        for cookie_dict in cookies_list:
-                            self.session.cookies.set(
-                                cookie_dict['name'],
-                                cookie_dict['value'],
-                                domain=cookie_dict.get('domain'),
-                                path=cookie_dict.get('path')
-                            )
-                    else:
-                        # 旧格式：简单的名称-值字典
-                        self.session.cookies.update(cookies_list)
-                        
-                logger.info("已从文件加载Cookie")
-                return True
-            except Exception as e:
-                logger.error(f"加载Cookie失败: {e}")
+        """从Cookie数据库加载Cookie，数据库中没有该账号时迁移旧的Cookie文件"""
+        try:
+            store = get_cookie_store()
+            if not store.has(self.username) and os.path.exists(self.cookie_file):
+                count = store.migrate(self.username, self.cookie_file)
+                if count:
+                    self.logger.info("已将%s个Cookie从%s迁移到Cookie数据库", count, self.cookie_file)
+
+            cookies = store.load(self.username)
+            if not cookies:
+                return False
+            for cookie in cookies:
+                self.session.cookies.set_cookie(cookie)
+            self.logger.info("已从Cookie数据库加载Cookie")
+            return True
+        except Exception as e:
+            self.logger.error("加载Cookie失败: %s", e)
         return False
     
     def save_cookies(self):
-        """保存Cookie到文件"""
+        """保存Cookie到Cookie数据库"""
         try:
-            # 保存完整的Cookie信息，包括域名、路径等属性
-            cookies_list = []
-            for cookie in self.session.cookies:
-                cookie_dict = {
-                    'name': cookie.name,
-                    'value': cookie.value,
-                    'domain': cookie.domain,
-                    'path': cookie.path,
-                    'expires': cookie.expires,
-                    'secure': cookie.secure
-                }
-                cookies_list.append(cookie_dict)
-            
-            with open(Config.COOKIE_FILE, 'w') as f:
-                json.dump(cookies_list, f)
-            logger.info("Cookie已保存到文件")
+            # 保存完整的Cookie信息，包括域名、路径、过期时间等属性
+            get_cookie_store().save(self.username, self.session.cookies)
+            self.logger.info("Cookie已保存到Cookie数据库")
             return True
         except Exception as e:
-            logger.error(f"保存Cookie失败: {e}")
+            self.logger.error("保存Cookie失败: %s", e)
             return False
     
+    def has_valid_auth_cookie(self):
+        """离线检查Cookie中的登录凭证(auth)是否存在且未过期"""
+        now = time.time()
+        auth_cookies = [cookie for cookie in self.session.cookies if cookie.name.endswith('_auth')]
+        if not auth_cookies:
+            return False
+        return any(cookie.expires is None or cookie.expires > now for cookie in auth_cookies)
+
+    @timed_phase('login_probe')
     def check_login_status(self):
         """检查登录状态"""
+        if Config.LOGIN_PROBE == 'full':
+            return self.check_login_status_full()
+
+        # 本地Cookie中没有有效的登录凭证时无需请求网络
+        if not self.has_valid_auth_cookie():
+            self.logger.info("Cookie中没有有效的登录凭证，需要重新登录")
+            return False
+
+        try:
+            # 签到页面本身就需要登录，且后续检查签到状态会复用这次请求的结果
+            page = self.fetch_sign_page()
+            self.logger.debug("登录状态检测: UID=%s, 签到按钮=%s", page.uid, page.sign_text)
+            if page.uid or page.sign_text:
+                self.logger.info("Cookie有效，已登录状态")
+                return True
+            else:
+                self.logger.info("Cookie无效或已过期，需要重新登录")
+                return False
+        except Exception as e:
+            self.logger.error("检查登录状态失败: %s", e)
+            return False
+
+    def check_login_status_full(self):
+        """通过解析论坛首页检查登录状态"""
         try:
-            response = self.session.get(Config.BASE_URL)
-            soup = BeautifulSoup(response.text, 'html.parser')
+            response = self.request('GET', Config.BASE_URL)
+            doc = HtmlDoc(response.text, parse_only={'name': 'a'})
             
             # 检查是否存在登录链接，如果存在则表示未登录
-            login_links = soup.select('a[href*="member.php?mod=logging&action=login"]')
+            login_links = doc.select('a[href*="member.php?mod=logging&action=login"]')
             
             # 检查页面内容是否包含用户名
-            username_in_page = Config.USERNAME in response.text
+            username_in_page = self.username in response.text
             
             # 检查是否有个人中心链接
-            user_center_links = soup.select('a[href*="home.php?mod=space"]')
+            user_center_links = doc.select('a[href*="home.php?mod=space"]')
             
             # 输出详细的登录状态检测信息
-            logger.debug(f"登录状态检测: 登录链接数量={len(login_links)}, 用户名在页面中={username_in_page}, 个人中心链接数量={len(user_center_links)}")
+            self.logger.debug("登录状态检测: 登录链接数量=%s, 用户名在页面中=%s, 个人中心链接数量=%s", len(login_links), username_in_page, len(user_center_links))
             
             # 如果没有登录链接或者页面中包含用户名，则认为已登录
             if (len(login_links) == 0 or username_in_page) and len(user_center_links) > 0:
-                logger.info("Cookie有效，已登录状态")
+                self.logger.info("Cookie有效，已登录状态")
                 return True
             else:
-                logger.info("Cookie无效或已过期，需要重新登录")
+                self.logger.info("Cookie无效或已过期，需要重新登录")
                 return False
         except Exception as e:
-            logger.error(f"检查登录状态失败: {e}")
+            self.logger.error("检查登录状态失败: %s", e)
             return False
 
     def get_access_token(self):
-        """获取百度API的access_token，带缓存功能"""
+        """获取百度API的access_token，进程内和磁盘双重缓存"""
         try:
-            # 检查是否有缓存的token
-            if os.path.exists(Config.TOKEN_CACHE_FILE):
-                try:
-                    with open(Config.TOKEN_CACHE_FILE, 'r') as f:
-                        token_data = json.load(f)
-                        # 检查token是否过期（百度token有效期为30天）
-                        if token_data.get('expires_time', 0) > time.time():
-                            logger.info("使用缓存的access_token")
-                            return token_data.get('access_token')
-                        else:
-                            logger.info("缓存的access_token已过期，重新获取")
-                except Exception as e:
-                    logger.warning(f"读取token缓存文件失败: {e}")
-            
-            # 获取新token
-            url = "https://aip.baidubce.com/oauth/2.0/token"
-            params = {
-                "grant_type": "client_credentials", 
-                "client_id": Config.API_KEY, 
-                "client_secret": Config.SECRET_KEY
-            }
-            
-            # 添加重试机制
-            for retry in range(Config.MAX_RETRIES):
-                try:
-                    response = requests.post(url, params=params)
-                    if response.status_code == 200:
-                        result = response.json()
-                        access_token = str(result.get("access_token"))
-                        expires_in = result.get("expires_in", 2592000)  # 默认30天
-                        
-                        # 缓存token
-                        token_cache = {
-                            'access_token': access_token,
-                            'expires_time': time.time() + expires_in - 86400  # 提前一天过期
-                        }
-                        try:
-                            with open(Config.TOKEN_CACHE_FILE, 'w') as f:
-                                json.dump(token_cache, f)
-                            logger.info("access_token已缓存")
-                        except Exception as e:
-                            logger.warning(f"缓存access_token失败: {e}")
-                        
-                        return access_token
-                    else:
-                        logger.error(f"获取access_token失败，状态码: {response.status_code}，重试({retry+1}/{Config.MAX_RETRIES})")
-                        if retry < Config.MAX_RETRIES - 1:
-                            time.sleep(Config.RETRY_DELAY)
-                except Exception as e:
-                    logger.error(f"获取access_token请求异常: {e}，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-            
-            logger.error(f"获取access_token失败，已达到最大重试次数({Config.MAX_RETRIES})")
-            return None
+            return get_token_provider().get(self.retry)
         except Exception as e:
-            logger.error(f"获取access_token过程发生错误: {e}")
+            self.logger.error("获取access_token过程发生错误: %s", e)
             return None
     
-    def recognize_captcha(self, captcha_url):
-        """识别验证码，带重试机制"""
-        for retry in range(Config.MAX_RETRIES):
-            try:
-                # 下载验证码图片
-                captcha_response = self.session.get(captcha_url)
-                if captcha_response.status_code != 200:
-                    logger.error(f"下载验证码图片失败，状态码: {captcha_response.status_code}，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-                        continue
-                    return None
-                
-                # 将图片转换为Base64编码
-                captcha_base64 = base64.b64encode(captcha_response.content).decode('utf-8')
-                
-                # 获取access_token
-                access_token = self.get_access_token()
-                if not access_token:
-                    logger.error(f"获取百度API access_token失败，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-                        continue
-                    return None
-                    
-                # 构建API请求URL
-                url = f"{Config.CAPTCHA_API_URL}?access_token={access_token}"
-                
-                # 构建请求参数
-                payload = f'image={urllib.parse.quote_plus(captcha_base64)}&detect_direction=false&paragraph=false&probability=false'
-                
-                # 设置请求头
-                headers = {
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                    'Accept': 'application/json'
-                }
-                
-                # 发送请求
-                api_response = requests.request("POST", url, headers=headers, data=payload.encode("utf-8"))
-                
-                if api_response.status_code != 200:
-                    logger.error(f"验证码识别API请求失败，状态码: {api_response.status_code}，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-                        continue
-                    return None
-                
-                # 解析API响应
-                result = api_response.json()
-                if 'words_result' in result and len(result['words_result']) > 0:
-                    captcha_text = result['words_result'][0]['words']
-                    # 清理验证码文本，移除空格和特殊字符
-                    captcha_text = re.sub(r'[\s\W]+', '', captcha_text)
-                    logger.info(f"验证码识别成功: {captcha_text}")
-                    return captcha_text
-                elif 'error_code' in result:
-                    logger.error(f"验证码识别API返回错误: {result.get('error_code')}, {result.get('error_msg')}，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-                        continue
-                    return None
+    def recognize_captcha(self, captcha_url, prefetched=None):
+        """下载并识别验证码，带重试机制
+
+        prefetched为预先开始下载验证码图片的Future，首次尝试时直接使用其结果。
+        """
+        for attempt in self.retry.attempts('captcha'):
+            try:
+                # 下载验证码图片
+                if prefetched is not None:
+                    # 预先下载的耗时已在后台计入captcha阶段
+                    captcha_response = prefetched.result()
+                    prefetched = None
                 else:
-                    logger.error(f"验证码识别API返回格式异常: {result}，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-                        continue
-                    return None
-            except Exception as e:
-                logger.error(f"验证码识别过程发生错误: {e}，重试({retry+1}/{Config.MAX_RETRIES})")
-                if retry < Config.MAX_RETRIES - 1:
-                    time.sleep(Config.RETRY_DELAY)
+                    with self.metrics.phase('captcha', self.username):
+                        captcha_response = self.request('GET', captcha_url)
+                if captcha_response.status_code != 200:
+                    self.logger.error("下载验证码图片失败，状态码: %s，重试(%s)", captcha_response.status_code, attempt)
                     continue
-                return None
+                
+                chain = get_captcha_chain()
+                with self.metrics.phase('ocr', self.username) as outcome:
+                    if Config.CAPTCHA_MODE == 'race':
+                        solution = chain.race(captcha_response.content, self)
+                    else:
+                        solution = chain.solve(captcha_response.content, self)
+                    outcome.ok = solution is not None
+                if solution:
+                    self.logger.info("验证码识别成功(%s): %s", solution.solver.name, solution.text)
+                    return solution
+                self.logger.error("所有验证码识别后端均未能识别，重试(%s)", attempt)
+            except Exception as e:
+                self.logger.error("验证码识别过程发生错误: %s，重试(%s)", e, attempt)
+                continue
         
-        logger.error(f"验证码识别失败，已达到最大重试次数({Config.MAX_RETRIES})")
+        self.logger.error("验证码识别失败，重试次数已用尽")
         return None
     
+    def prefetch_captcha(self, login_html):
+        """在登录页面中找到验证码图片时，立即在后台开始下载"""
+        if not Config.CAPTCHA_PREFETCH:
+            return None
+        captcha_url = LoginPage.find_captcha_url(login_html)
+        if not captcha_url:
+            return None
+        return get_background_executor().submit(self.request, 'GET', captcha_url, phase='captcha')
+
+    def submit_login(self, login_url, login_data, captcha_url=None, prefetched=None):
+        """提交登录表单，验证码错误时刷新验证码后直接重新提交，无需重新获取登录页面
+
+        返回(登录响应, 验证码识别结果)，验证码识别失败时登录响应为None。
+        """
+        captcha_solution = None
+        for submit in range(Config.CAPTCHA_RESUBMITS + 1):
+            if captcha_url:
+                if submit:
+                    # 更换update参数获取一张新的验证码
+                    captcha_url = re.sub(r'update=\d+', f'update={random.randint(10000, 99999)}', captcha_url)
+                    prefetched = None
+                captcha_solution = self.recognize_captcha(captcha_url, prefetched)
+                if not captcha_solution:
+                    return None, None
+                login_data['seccodeverify'] = captcha_solution.text
+
+            with self.metrics.phase('login_post', self.username):
+                login_response = self.request('POST', login_url, data=login_data, allow_redirects=True)
+            
+            # 添加更多调试信息，未开启调试日志时不解码响应内容
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("登录请求URL: %s", login_url)
+                self.logger.debug("登录请求数据: %s", login_data)
+                self.logger.debug("登录响应状态码: %s", login_response.status_code)
+                self.logger.debug("登录响应内容: %s...", login_response.text[:500])
+
+            if not (captcha_solution and '验证码错误' in login_response.text):
+                break
+            get_captcha_chain().report(captcha_solution, False)
+            if submit < Config.CAPTCHA_RESUBMITS:
+                self.logger.warning("验证码错误，刷新验证码后重新提交")
+        return login_response, captcha_solution
+
+    @timed_phase('login')
     def login(self):
         """使用账号密码登录，带重试机制"""
-        for retry in range(Config.MAX_RETRIES):
+        for attempt in self.retry.attempts('login'):
             try:
                 # 获取登录页面
-                response = self.session.get(Config.LOGIN_URL)
-                soup = BeautifulSoup(response.text, 'html.parser')
+                with self.metrics.phase('login_page', self.username):
+                    response = self.request('GET', Config.LOGIN_URL)
                 
-                # 获取登录表单信息
-                login_form = None
-                for form in soup.find_all('form'):
-                    form_id = form.get('id', '')
-                    if form_id and ('loginform' in form_id or 'lsform' in form_id):
-                        login_form = form
-                        break
-                    elif form.get('name') == 'login':
-                        login_form = form
-                        break
-                    elif form.get('action') and 'logging' in form.get('action'):
-                        login_form = form
-                        break
+                # 解析登录表单的同时开始下载验证码图片
+                prefetched = self.prefetch_captcha(response.text)
+                page = LoginPage(response.text)
                 
-                if not login_form:
-                    # 尝试查找任何表单，可能是登录表单
-                    all_forms = soup.find_all('form')
-                    if all_forms:
-                        login_form = all_forms[0]  # 使用第一个表单
-                        logger.info(f"使用备选表单: ID={login_form.get('id')}, Action={login_form.get('action')}")
+                if page.fallback_form:
+                    self.logger.info("使用备选表单: ID=%s, Action=%s", page.form_id, page.form_action)
                 
-                if not login_form:
-                    logger.error(f"未找到登录表单，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-                        continue
-                    return False
+                if not page.form_found:
+                    self.logger.error("未找到登录表单，重试(%s)", attempt)
+                    continue
                     
-                # 提取登录表单ID中的随机部分
-                form_id = login_form.get('id', '')
-                login_hash = form_id.split('_')[-1] if '_' in form_id else ''
-                
-                # 获取登录表单的action属性
-                form_action = login_form.get('action', '')
-                logger.info(f"找到登录表单: ID={form_id}, Action={form_action}")
-                
-                # 获取表单字段
-                formhash = soup.find('input', {'name': 'formhash'})
-                if not formhash:
-                    logger.error(f"未找到登录表单的formhash字段，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-                        continue
-                    return False
+                self.logger.info("找到登录表单: ID=%s, Action=%s", page.form_id, page.form_action)
                 
                 # 获取表单字段
-                formhash = formhash['value']
-                
-                # 获取用户名输入框ID
-                username_input = soup.find('input', {'name': 'username'})
-                username_id = username_input.get('id', '') if username_input else ''
-                
-                # 获取密码输入框ID
-                password_input = soup.find('input', {'name': 'password'})
-                password_id = password_input.get('id', '') if password_input else ''
+                if not page.formhash:
+                    self.logger.error("未找到登录表单的formhash字段，重试(%s)", attempt)
+                    continue
                 
-                logger.info(f"找到用户名输入框ID: {username_id}")
-                logger.info(f"找到密码输入框ID: {password_id}")
+                self.logger.info("找到用户名输入框ID: %s", page.username_id)
+                self.logger.info("找到密码输入框ID: %s", page.password_id)
                 
                 # 构建登录数据
-                login_data = {
-                    'formhash': formhash,
-                    'referer': Config.BASE_URL,
-                    'loginfield': 'username',
-                    'username': Config.USERNAME,
-                    'password': Config.PASSWORD,
-                    'questionid': '0',
-                    'answer': '',
-                    'cookietime': '2592000',  # 保持登录状态30天
-                    'loginsubmit': 'true'
-                }
-                
-                # 添加特定的表单字段
-                if username_id:
-                    login_data[username_id] = Config.USERNAME
-                if password_id:
-                    login_data[password_id] = Config.PASSWORD
+                login_data = page.login_data(self.username, self.password)
                 
                 # 检查是否需要验证码
-                seccodeverify = soup.find('input', {'name': 'seccodeverify'})
-                if seccodeverify:
-                    logger.info("检测到需要验证码，尝试自动识别验证码")
-                    
-                    # 获取验证码ID
-                    seccode_id = seccodeverify.get('id', '').replace('seccodeverify_', '')
+                captcha_url = None
+                if page.needs_seccode:
+                    self.logger.info("检测到需要验证码，尝试自动识别验证码")
                     
                     # 获取验证码图片URL
-                    captcha_img = soup.find('img', {'src': re.compile(r'misc\.php\?mod=seccode')})
-                    if not captcha_img:
-                        logger.error(f"未找到验证码图片，重试({retry+1}/{Config.MAX_RETRIES})")
-                        if retry < Config.MAX_RETRIES - 1:
-                            time.sleep(Config.RETRY_DELAY)
-                            continue
-                        return False
-                    
-                    captcha_url = Config.BASE_URL + captcha_img['src']
-                    logger.info(f"验证码图片URL: {captcha_url}")
-                    
-                    # 识别验证码
-                    captcha_text = self.recognize_captcha(captcha_url)
-                    if not captcha_text:
-                        logger.error(f"验证码识别失败，重试({retry+1}/{Config.MAX_RETRIES})")
-                        if retry < Config.MAX_RETRIES - 1:
-                            time.sleep(Config.RETRY_DELAY)
-                            continue
-                        return False
+                    if not page.captcha_src:
+                        self.logger.error("未找到验证码图片，重试(%s)", attempt)
+                        continue
                     
-                    # 添加验证码到登录数据
-                    login_data['seccodeverify'] = captcha_text
-                    login_data['seccodehash'] = seccode_id
+                    captcha_url = Config.BASE_URL + page.captcha_src
+                    self.logger.info("验证码图片URL: %s", captcha_url)
             
                 # 更新请求头，模拟真实浏览器
-                self.session.headers.update({
-                    'Origin': Config.BASE_URL.rstrip('/'),
-                    'Referer': Config.LOGIN_URL,
-                    'Content-Type': 'application/x-www-form-urlencoded',
-                    'Upgrade-Insecure-Requests': '1'
-                })
-                
-                # 构建登录URL
-                login_url = f"{Config.LOGIN_URL}&loginsubmit=yes&inajax=1"
+                self.session.headers.update(self.LOGIN_HEADERS)
                 
                 # 发送登录请求
-                login_response = self.session.post(login_url, data=login_data, allow_redirects=True)
-                
-                # 添加更多调试信息
-                logger.debug(f"登录请求URL: {login_url}")
-                logger.debug(f"登录请求数据: {login_data}")
-                logger.debug(f"登录响应状态码: {login_response.status_code}")
-                logger.debug(f"登录响应内容: {login_response.text[:500]}...")
+                login_response, captcha_solution = self.submit_login(self.LOGIN_SUBMIT_URL, login_data, captcha_url, prefetched)
+                if login_response is None:
+                    self.logger.error("验证码识别失败，重试(%s)", attempt)
+                    continue
                 
                 # 检查登录结果
                 if '验证码' in login_response.text and '验证码错误' in login_response.text:
-                    logger.error(f"验证码错误，登录失败，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-                        continue
-                    return False
+                    self.logger.error("验证码错误，登录失败，重试(%s)", attempt)
+                    continue
                 
                 # 检查登录是否成功
                 if 'succeedhandle_' in login_response.text or self.check_login_status():
-                    logger.info(f"账号 {Config.USERNAME} 登录成功")
+                    self.logger.info("账号 %s 登录成功", self.username)
+                    if captcha_solution:
+                        get_captcha_chain().report(captcha_solution, True)
                     self.save_cookies()
                     return True
                 else:
-                    logger.error(f"登录失败，请检查账号密码，重试({retry+1}/{Config.MAX_RETRIES})")
-                    logger.debug(f"登录响应: {login_response.text[:200]}...")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-                        continue
-                    return False
-            except Exception as e:
-                logger.error(f"登录过程发生错误: {e}，重试({retry+1}/{Config.MAX_RETRIES})")
-                if retry < Config.MAX_RETRIES - 1:
-                    time.sleep(Config.RETRY_DELAY)
+                    self.logger.error("登录失败，请检查账号密码，重试(%s)", attempt)
+                    if self.logger.isEnabledFor(logging.DEBUG):
+                        self.logger.debug("登录响应: %s...", login_response.text[:200])
                     continue
-                return False
+            except Exception as e:
+                self.logger.error("登录过程发生错误: %s，重试(%s)", e, attempt)
+                continue
         
-        logger.error(f"登录失败，已达到最大重试次数({Config.MAX_RETRIES})")
+        self.logger.error("登录失败，重试次数已用尽")
         return False
     
+    def request(self, method, url, phase=None, **kwargs):
+        """发送HTTP请求，超时时间受本次运行剩余时间的约束
+
+        请求计入当前统计阶段；在后台线程中发送的请求通过phase指定所属阶段。
+        """
+        if phase is not None:
+            with self.metrics.phase(phase, self.username):
+                return self.request(method, url, **kwargs)
+        rate_limit(url, self.retry.deadline)
+        kwargs.setdefault('timeout', self.retry.deadline.timeout())
+        response = self.session.request(method, url, **kwargs)
+        Metrics.count_request(response)
+        return response
+
+    def fetch_sign_page(self):
+        """请求并解析签到页面，结果缓存到self.sign_page"""
+        response = self.request('GET', Config.SIGN_URL)
+        self.sign_page = SignPage(response.text)
+        return self.sign_page
+
+    @timed_phase('sign_status')
     def check_sign_status(self):
-        """检查签到状态，带重试机制"""
-        for retry in range(Config.MAX_RETRIES):
+        """检查签到状态，优先使用本次运行中已解析的签到页面，带重试机制"""
+        for attempt in self.retry.attempts('sign_status'):
             try:
-                response = self.session.get(Config.SIGN_URL)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # 查找签到按钮
-                sign_btn = soup.select_one('.signbtn .btna')
-                if not sign_btn:
-                    logger.error(f"未找到签到按钮，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-                        continue
-                    return None, None
-                
-                # 获取签到链接和状态
-                sign_text = sign_btn.text.strip()
-                sign_link = sign_btn.get('href')
+                # 没有缓存或缓存的页面中没有签到按钮时才重新请求
+                if self.sign_page is None or not self.sign_page.sign_text:
+                    self.fetch_sign_page()
                 
-                # 提取sign参数
-                sign_param = None
-                if sign_link:
-                    match = re.search(r'sign=([^&]+)', sign_link)
-                    if match:
-                        sign_param = match.group(1)
+                if not self.sign_page.sign_text:
+                    self.logger.error("未找到签到按钮，重试(%s)", attempt)
+                    continue
                 
-                return sign_text, sign_param
+                return self.sign_page.sign_text, self.sign_page.sign_param
             except Exception as e:
-                logger.error(f"检查签到状态失败: {e}，重试({retry+1}/{Config.MAX_RETRIES})")
-                if retry < Config.MAX_RETRIES - 1:
-                    time.sleep(Config.RETRY_DELAY)
-                    continue
-                return None, None
+                self.logger.error("检查签到状态失败: %s，重试(%s)", e, attempt)
+                continue
+        
+        self.logger.error("检查签到状态失败，重试次数已用尽")
+        return None, None
     
+    @timed_phase('sign')
     def do_sign(self, sign_param):
         """执行签到，带重试机制"""
-        for retry in range(Config.MAX_RETRIES):
+        for attempt in self.retry.attempts('sign'):
             try:
                 sign_url = f"{Config.SIGN_URL}&sign={sign_param}"
-                response = self.session.get(sign_url)
+                response = self.request('GET', sign_url)
                 
                 # 检查签到结果
                 if response.status_code == 200:
-                    # 再次检查签到状态
-                    sign_text, _ = self.check_sign_status()
-                    if sign_text == "今日已打卡":
-                        logger.info("签到成功")
+                    # 签到状态已改变，优先解析签到请求的响应，响应中没有签到按钮时再重新获取签到页面
+                    page = SignPage(response.text)
+                    if not page.sign_text:
+                        page = self.fetch_sign_page()
+                    else:
+                        self.sign_page = page
+                    
+                    if page.sign_text == "今日已打卡":
+                        self.logger.info("签到成功")
                         return True
                     else:
-                        logger.error(f"签到请求已发送，但状态未更新，重试({retry+1}/{Config.MAX_RETRIES})")
-                        if retry < Config.MAX_RETRIES - 1:
-                            time.sleep(Config.RETRY_DELAY)
-                            continue
-                        return False
-                else:
-                    logger.error(f"签到请求失败，状态码: {response.status_code}，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
+                        self.logger.error("签到请求已发送，但状态未更新，重试(%s)", attempt)
                         continue
-                    return False
-            except Exception as e:
-                logger.error(f"签到过程发生错误: {e}，重试({retry+1}/{Config.MAX_RETRIES})")
-                if retry < Config.MAX_RETRIES - 1:
-                    time.sleep(Config.RETRY_DELAY)
+                else:
+                    self.logger.error("签到请求失败，状态码: %s，重试(%s)", response.status_code, attempt)
                     continue
-                return False
+            except Exception as e:
+                self.logger.error("签到过程发生错误: %s，重试(%s)", e, attempt)
+                continue
+        
+        self.logger.error("签到失败，重试次数已用尽")
+        return False
     
+    @timed_phase('sign_info')
     def get_sign_info(self):
-        """获取签到信息，带重试机制"""
-        for retry in range(Config.MAX_RETRIES):
+        """获取签到信息，优先使用本次运行中已解析的签到页面，带重试机制"""
+        for attempt in self.retry.attempts('sign_info'):
             try:
-                response = self.session.get(Config.SIGN_URL)
-                soup = BeautifulSoup(response.text, 'html.parser')
-                
-                # 查找签到信息区域
-                sign_info_divs = soup.find_all('div', class_='bm')
-                sign_info_div = None
-                for div in sign_info_divs:
-                    header = div.find('div', class_='bm_h')
-                    if header and '我的打卡动态' in header.get_text():
-                        sign_info_div = div
-                        break
-                
-                if not sign_info_div:
-                    logger.error(f"未找到签到信息区域，重试({retry+1}/{Config.MAX_RETRIES})")
-                    if retry < Config.MAX_RETRIES - 1:
-                        time.sleep(Config.RETRY_DELAY)
-                        continue
-                    return {}
-                
-                # 查找签到信息列表
-                info_list = sign_info_div.find('div', class_='bm_c').find_all('li')
+                if self.sign_page is None or not self.sign_page.sign_info:
+                    self.fetch_sign_page()
                 
-                # 解析签到信息
-                sign_info = {}
-                for item in info_list:
-                    text = item.get_text(strip=True)
-                    if '：' in text:
-                        key, value = text.split('：', 1)
-                        sign_info[key] = value
+                if not self.sign_page.sign_info:
+                    self.logger.error("未找到签到信息区域，重试(%s)", attempt)
+                    continue
                 
-                return sign_info
+                return dict(self.sign_page.sign_info)
             except Exception as e:
-                logger.error(f"获取签到信息失败: {e}，重试({retry+1}/{Config.MAX_RETRIES})")
-                if retry < Config.MAX_RETRIES - 1:
-                    time.sleep(Config.RETRY_DELAY)
-                    continue
-                return {}
+                self.logger.error("获取签到信息失败: %s，重试(%s)", e, attempt)
+                continue
         
-        logger.error(f"获取签到信息失败，已达到最大重试次数({Config.MAX_RETRIES})")
+        self.logger.error("获取签到信息失败，重试次数已用尽")
         return {}
     
-    def run(self):
-        """运行签到流程，带重试机制"""
-        logger.info("===== 开始运行签到脚本 =====")
+    def run(self, deadline=None, metrics=None):
+        """运行签到流程，带重试机制，所有重试受同一个截止时间约束，各阶段的耗时记录到metrics"""
+        self.logger.info("===== 开始运行签到脚本 =====")
+        if metrics is not None:
+            self.metrics = metrics
+        # 单个账号的时间预算，同时不超过整次运行的截止时间
+        deadline = (deadline or Deadline(Config.RUN_DEADLINE)).child(Config.ACCOUNT_TIME_BUDGET)
+        self.retry = RetryPolicy(deadline, self.logger)
+        # 每次运行重新获取签到页面
+        self.sign_page = None
         
         # 检查登录状态
         if not self.check_login_status():
             # 如果未登录，尝试登录
             if not self.login():
-                logger.error("登录失败，签到流程终止")
+                self.logger.error("登录失败，签到流程终止")
                 return False
         
         # 检查签到状态
         sign_text, sign_param = self.check_sign_status()
         if sign_text is None or sign_param is None:
-            logger.error("获取签到状态失败，签到流程终止")
+            self.logger.error("获取签到状态失败，签到流程终止")
             return False
         
-        logger.info(f"当前签到状态: {sign_text}")
+        self.logger.info("当前签到状态: %s", sign_text)
         
         # 如果未签到，执行签到
         if sign_text == "点击打卡":
-            logger.info("开始执行签到...")
+            self.logger.info("开始执行签到...")
             if self.do_sign(sign_param):
                 return True
             else:
-                logger.error("签到失败")
+                self.logger.error("签到失败")
                 return False
         elif sign_text == "今日已打卡":
-            logger.info("今日已签到，无需重复签到")
+            self.logger.info("今日已签到，无需重复签到")
             return True
         else:
-            logger.warning(f"未知的签到状态: {sign_text}，签到流程终止")
+            self.logger.warning("未知的签到状态: %s，签到流程终止", sign_text)
             return False
 
+    def collect(self, deadline=None, metrics=None):
+        """运行签到流程并获取签到信息，返回该账号的签到结果"""
+        result = {
+            'username': self.username, 'success': False, 'sign_info': {}, 'error': None, 'timeout': False,
+            'cached': False,
+        }
+        try:
+            result['success'] = self.run(deadline, metrics)
+            if result['success']:
+                # 获取并记录签到信息
+                sign_info = self.get_sign_info()
+                if sign_info:
+                    self.logger.info("===== 签到信息 =====")
+                    for key, value in sign_info.items():
+                        self.logger.info("%s: %s", key, value)
+                result['sign_info'] = sign_info
+        except Exception as e:
+            self.logger.error("签到流程发生错误: %s", e)
+            result['error'] = str(e)
+
+        if not result['success'] and self.retry.deadline.expired:
+            self.logger.error("签到耗时超过时间预算，已中止")
+            result['timeout'] = True
+            result['error'] = result['error'] or "签到超时"
+        return result
+
     def push_run(self):
-        run_result = self.run()
+        result = self.collect()
 
         # 输出最终结果
-        if run_result:
-            message_arr = []
-            # 获取并记录签到信息
-            sign_info = sign.get_sign_info()
-            if sign_info:
-                logger.info("===== 签到信息 =====")
-                for key, value in sign_info.items():
-                    message_arr.append(f"{key}: {value}")
-                    logger.info(f"{key}: {value}")
-                send('飞牛签到成功', '\n'.join(message_arr))
-        return run_result
+        if result['success'] and result['sign_info']:
+            message_arr = [f"{key}: {value}" for key, value in result['sign_info'].items()]
+            from notify import send
+            send('飞牛签到成功', '\n'.join(message_arr))
+        return result['success']
+
+
+class SignEngine:
+    """多账号并发签到引擎，每个账号使用独立的Session，Cookie保存在共享的Cookie数据库中"""
+
+    def __init__(self, accounts, max_workers=None):
+        self.accounts = accounts
+        self.max_workers = max_workers or Config.MAX_WORKERS
+        # 已创建的签到实例，常驻模式下复用其Session和Cookie
+        self.clients = {}
+        # 最近一次运行的分阶段统计
+        self.metrics = Metrics()
+
+    def client(self, username, password):
+        """返回账号的签到实例"""
+        client = self.clients.get(username)
+        if client is None or client.password != password:
+            client = self.clients[username] = FNSignIn(username, password)
+        return client
+
+    def sign_account(self, username, password, deadline):
+        """签到单个账号"""
+        return self.client(username, password).collect(deadline, self.metrics)
+
+    def close(self):
+        """关闭所有签到实例的Session"""
+        for client in self.clients.values():
+            client.session.close()
+        self.clients.clear()
+
+    def run(self, accounts=None):
+        """签到所有账号（或指定的部分账号），按账号顺序返回每个账号的签到结果
+
+        本地记录中今日已签到的账号直接返回记录的结果，不访问论坛，FORCE为真时忽略本地记录。
+        签到记录数据库不可用时签到所有账号，不影响签到结果。
+        """
+        accounts = self.accounts if accounts is None else accounts
+        if not accounts:
+            return []
+
+        self.metrics = Metrics()
+        # 使用开始时的日期，跨过零点的运行不会把新一天误记为已签到
+        day = site_today()
+        signed = {}
+        if not Config.FORCE:
+            try:
+                signed = get_sign_ledger().signed(day)
+            except Exception as e:
+                logger.warning("读取签到记录失败，签到所有账号: %s", e)
+        pending = [(username, password) for username, password in accounts if username not in signed]
+        if len(pending) < len(accounts):
+            logger.info("%s个账号今日已签到，跳过（使用--force强制检查）", len(accounts) - len(pending))
+
+        fresh = {}
+        if pending:
+            results = self.sign_all(pending)
+            try:
+                get_sign_ledger().record(day, results)
+            except Exception as e:
+                logger.warning("保存签到记录失败: %s", e)
+            try:
+                get_sign_history().append(results)
+            except Exception as e:
+                logger.warning("保存签到历史失败: %s", e)
+            fresh = {result['username']: result for result in results}
+            self.log_summary()
+
+        return [
+            fresh.get(username) or {
+                'username': username, 'success': True, 'sign_info': signed[username], 'error': None,
+                'timeout': False, 'cached': True,
+            }
+            for username, _ in accounts
+        ]
+
+    def sign_all(self, accounts):
+        """使用线程池并发签到，按账号顺序返回签到结果"""
+        workers = max(1, min(self.max_workers, len(accounts)))
+        logger.info("共%s个账号，使用%s个线程并发签到", len(accounts), workers)
+        # 所有账号共享同一个截止时间，保证整批签到的总耗时有上限
+        deadline = Deadline(Config.RUN_DEADLINE)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='fn_sign') as executor:
+            futures = [
+                executor.submit(self.sign_account, username, password, deadline)
+                for username, password in accounts
+            ]
+            return [future.result() for future in futures]
+
+    def log_summary(self):
+        """输出各阶段耗时和验证码识别后端的统计信息"""
+        for line in self.metrics.summary():
+            logger.info("阶段统计 %s", line)
+        if _captcha_chain is not None:
+            for line in _captcha_chain.summary():
+                logger.info("验证码识别统计 %s", line)
+
+    @staticmethod
+    def build_message(results):
+        """将所有账号的签到结果合并为一条通知内容"""
+        blocks = []
+        for result in results:
+            if result['success']:
+                lines = [f"【{result['username']}】签到成功"]
+                lines.extend(f"{key}: {value}" for key, value in result['sign_info'].items())
+            else:
+                lines = [f"【{result['username']}】签到失败"]
+                if result['error']:
+                    lines.append(f"错误信息: {result['error']}")
+            blocks.append('\n'.join(lines))
+        return '\n\n'.join(blocks)
+
+    def notify(self, results):
+        """所有账号签到完成后发送一条合并通知，并导出本次运行的统计
+
+        本地记录中今日已签到的账号在之前的运行中已经通知过，不再重复通知。
+        """
+        fresh = [result for result in results if not result['cached']]
+        success_count = sum(1 for result in fresh if result['success'])
+        if success_count:
+            if success_count == len(fresh):
+                title = '飞牛签到成功'
+            else:
+                title = f'飞牛签到完成（成功{success_count}/{len(fresh)}）'
+            with self.metrics.phase('notify'):
+                from notify import send
+                pushed = send(title, self.build_message(fresh))
+            failed = [f"{item['channel']}({item['status']})" for item in pushed if item['status'] != 'success']
+            if failed:
+                logger.warning("部分推送渠道未成功: %s", ', '.join(failed))
+        elif results and not fresh:
+            logger.info("所有账号今日均已签到，不发送通知")
+        self.metrics.finished = time.time()
+        self.metrics.export(results)
+
+
+def import_aiohttp():
+    """异步签到使用的aiohttp是可选依赖，使用时才导入"""
+    try:
+        import aiohttp
+    except ImportError:
+        raise RuntimeError("异步签到需要安装aiohttp: pip install aiohttp") from None
+    return aiohttp
+
+
+def cookie_to_morsel(cookie):
+    """将保存的Cookie转换为aiohttp可以导入的SimpleCookie"""
+    import email.utils
+    from http.cookies import SimpleCookie
+    jar = SimpleCookie()
+    jar[cookie.name] = cookie.value
+    morsel = jar[cookie.name]
+    morsel['domain'] = cookie.domain
+    morsel['path'] = cookie.path or '/'
+    if cookie.expires:
+        morsel['expires'] = email.utils.formatdate(cookie.expires, usegmt=True)
+    if cookie.secure:
+        morsel['secure'] = True
+    if cookie.has_nonstandard_attr('HttpOnly'):
+        morsel['httponly'] = True
+    return jar
+
+
+def morsel_to_cookie(morsel):
+    """将aiohttp中的Cookie转换为可以保存到Cookie数据库的Cookie"""
+    from http.cookiejar import http2time
+    from requests.cookies import create_cookie
+    expires = None
+    if morsel['max-age']:
+        expires = int(time.time()) + int(morsel['max-age'])
+    elif morsel['expires']:
+        expires = http2time(morsel['expires'])
+    return create_cookie(
+        morsel.key, morsel.value, domain=morsel['domain'], path=morsel['path'] or '/', expires=expires,
+        secure=bool(morsel['secure']), rest={'HttpOnly': None} if morsel['httponly'] else {}
+    )
+
+
+class AsyncResponse:
+    """异步请求的响应，提供与requests.Response相同的status_code、content和text属性"""
+
+    def __init__(self, status_code, content, encoding):
+        self.status_code = status_code
+        self.content = content
+        self.encoding = encoding
+        self._text = None
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = self.content.decode(self.encoding or 'utf-8', errors='replace')
+        return self._text
+
+
+class AsyncFNSignIn:
+    """FNSignIn的asyncio版本
+
+    签到流程与FNSignIn相同，页面解析复用SignPage和LoginPage，HTTP请求使用aiohttp，
+    所有账号共享同一个连接池，单个事件循环即可同时处理大量账号。
+    验证码识别后端和Cookie数据库是同步实现，在线程池中运行，不阻塞事件循环。
+    需要在事件循环中创建，Cookie在run()开始时加载，使用完毕后调用close()。
+    """
+
+    def __init__(self, username, password, connector=None):
+        aiohttp = import_aiohttp()
+        self.username = username
+        self.password = password
+        self.logger = AccountLogger(logger, {'account': self.username})
+        # 本次运行中解析过的签到页面
+        self.sign_page = None
+        self.retry = RetryPolicy(log=self.logger)
+        self.metrics = Metrics()
+        # unsafe允许保存IP地址域名下的Cookie，便于对接本地测试服务器
+        self.cookie_jar = aiohttp.CookieJar(unsafe=True)
+        self.session = aiohttp.ClientSession(
+            connector=connector, connector_owner=connector is None,
+            cookie_jar=self.cookie_jar, headers=FNSignIn.HEADERS
+        )
+
+    async def close(self):
+        await self.session.close()
+
+    async def load_cookies(self):
+        """从Cookie数据库加载Cookie，数据库读取在线程池中进行"""
+        import asyncio
+        try:
+            cookies = await asyncio.to_thread(get_cookie_store().load, self.username)
+            for cookie in cookies:
+                self.cookie_jar.update_cookies(cookie_to_morsel(cookie), response_url=self.cookie_url(cookie))
+            if cookies:
+                self.logger.info("已从Cookie数据库加载Cookie")
+            return bool(cookies)
+        except Exception as e:
+            self.logger.error("加载Cookie失败: %s", e)
+            return False
+
+    @staticmethod
+    def cookie_url(cookie):
+        """Cookie所属站点的地址，aiohttp按该地址校验Cookie的域名"""
+        from yarl import URL
+        base_url = URL(Config.BASE_URL)
+        return base_url.with_host(cookie.domain.lstrip('.') or base_url.host).with_path('/')
+
+    def cookies(self):
+        return [morsel_to_cookie(morsel) for morsel in self.cookie_jar]
+
+    async def save_cookies(self):
+        """保存Cookie到Cookie数据库，数据库写入在线程池中进行"""
+        import asyncio
+        try:
+            await asyncio.to_thread(get_cookie_store().save, self.username, self.cookies())
+            self.logger.info("Cookie已保存到Cookie数据库")
+            return True
+        except Exception as e:
+            self.logger.error("保存Cookie失败: %s", e)
+            return False
+
+    def has_valid_auth_cookie(self):
+        """离线检查Cookie中的登录凭证(auth)是否存在且未过期"""
+        now = time.time()
+        auth_cookies = [cookie for cookie in self.cookies() if cookie.name.endswith('_auth')]
+        return any(cookie.expires is None or cookie.expires > now for cookie in auth_cookies)
+
+    async def request(self, method, url, **kwargs):
+        """发送HTTP请求并读取响应内容，超时时间受本次运行剩余时间的约束"""
+        import asyncio
+        aiohttp = import_aiohttp()
+        # 与线程池中的请求共享同一个限流器，等待时不阻塞事件循环
+        wait = rate_limit_delay(url, self.retry.deadline)
+        if wait:
+            await asyncio.sleep(wait)
+        connect_timeout, read_timeout = self.retry.deadline.timeout()
+        kwargs.setdefault('timeout', aiohttp.ClientTimeout(
+            total=self.retry.deadline.remaining(), sock_connect=connect_timeout, sock_read=read_timeout
+        ))
+        async with self.session.request(method, url, **kwargs) as response:
+            content = await response.read()
+            try:
+                encoding = response.get_encoding()
+            except RuntimeError:
+                encoding = 'utf-8'
+            response = AsyncResponse(response.status, content, encoding)
+            Metrics.count_request(response)
+            return response
+
+    @timed_phase('login_probe')
+    async def check_login_status(self):
+        """检查登录状态"""
+        if Config.LOGIN_PROBE == 'full':
+            return await self.check_login_status_full()
+
+        # 本地Cookie中没有有效的登录凭证时无需请求网络
+        if not self.has_valid_auth_cookie():
+            self.logger.info("Cookie中没有有效的登录凭证，需要重新登录")
+            return False
+
+        try:
+            page = await self.fetch_sign_page()
+            if page.uid or page.sign_text:
+                self.logger.info("Cookie有效，已登录状态")
+                return True
+            self.logger.info("Cookie无效或已过期，需要重新登录")
+            return False
+        except Exception as e:
+            self.logger.error("检查登录状态失败: %s", e)
+            return False
+
+    async def check_login_status_full(self):
+        """通过解析论坛首页检查登录状态"""
+        try:
+            response = await self.request('GET', Config.BASE_URL)
+            doc = HtmlDoc(response.text, parse_only={'name': 'a'})
+            login_links = doc.select('a[href*="member.php?mod=logging&action=login"]')
+            user_center_links = doc.select('a[href*="home.php?mod=space"]')
+            if (not login_links or self.username in response.text) and user_center_links:
+                self.logger.info("Cookie有效，已登录状态")
+                return True
+            self.logger.info("Cookie无效或已过期，需要重新登录")
+            return False
+        except Exception as e:
+            self.logger.error("检查登录状态失败: %s", e)
+            return False
+
+    def get_access_token(self):
+        """获取百度API的access_token，供在线程池中运行的验证码识别后端调用"""
+        try:
+            return get_token_provider().get(self.retry)
+        except Exception as e:
+            self.logger.error("获取access_token过程发生错误: %s", e)
+            return None
+
+    async def recognize_captcha(self, captcha_url, prefetched=None):
+        """下载并识别验证码，带重试机制，prefetched为预先开始下载验证码图片的Task"""
+        import asyncio
+        loop = asyncio.get_running_loop()
+        async for attempt in self.retry.attempts_async('captcha'):
+            try:
+                if prefetched is not None:
+                    # 预先下载的耗时已在后台任务中计入captcha阶段
+                    captcha_response = await prefetched
+                    prefetched = None
+                else:
+                    with self.metrics.phase('captcha', self.username):
+                        captcha_response = await self.request('GET', captcha_url)
+                if captcha_response.status_code != 200:
+                    self.logger.error("下载验证码图片失败，状态码: %s，重试(%s)", captcha_response.status_code, attempt)
+                    continue
+
+                chain = get_captcha_chain()
+                solve = chain.race if Config.CAPTCHA_MODE == 'race' else chain.solve
+                with self.metrics.phase('ocr', self.username) as outcome:
+                    # 复制当前上下文，识别后端在线程池中发送的请求也计入ocr阶段
+                    solution = await loop.run_in_executor(
+                        None, contextvars.copy_context().run, solve, captcha_response.content, self
+                    )
+                    outcome.ok = solution is not None
+                if solution:
+                    self.logger.info("验证码识别成功(%s): %s", solution.solver.name, solution.text)
+                    return solution
+                self.logger.error("所有验证码识别后端均未能识别，重试(%s)", attempt)
+            except Exception as e:
+                self.logger.error("验证码识别过程发生错误: %s，重试(%s)", e, attempt)
+
+        self.logger.error("验证码识别失败，重试次数已用尽")
+        return None
+
+    async def submit_login(self, login_data, captcha_url=None, prefetched=None):
+        """提交登录表单，验证码错误时刷新验证码后直接重新提交，返回(登录响应, 验证码识别结果)"""
+        import asyncio
+        captcha_solution = None
+        for submit in range(Config.CAPTCHA_RESUBMITS + 1):
+            if captcha_url:
+                if submit:
+                    captcha_url = re.sub(r'update=\d+', f'update={random.randint(10000, 99999)}', captcha_url)
+                    prefetched = None
+                captcha_solution = await self.recognize_captcha(captcha_url, prefetched)
+                if not captcha_solution:
+                    return None, None
+                login_data['seccodeverify'] = captcha_solution.text
+
+            with self.metrics.phase('login_post', self.username):
+                login_response = await self.request(
+                    'POST', FNSignIn.LOGIN_SUBMIT_URL, data=login_data, headers=FNSignIn.LOGIN_HEADERS
+                )
+            if not (captcha_solution and '验证码错误' in login_response.text):
+                break
+            await asyncio.to_thread(get_captcha_chain().report, captcha_solution, False)
+            if submit < Config.CAPTCHA_RESUBMITS:
+                self.logger.warning("验证码错误，刷新验证码后重新提交")
+        return login_response, captcha_solution
+
+    @timed_phase('login')
+    async def login(self):
+        """使用账号密码登录，带重试机制"""
+        import asyncio
+        async for attempt in self.retry.attempts_async('login'):
+            prefetched = None
+            try:
+                with self.metrics.phase('login_page', self.username):
+                    response = await self.request('GET', Config.LOGIN_URL)
+
+                # 解析登录表单的同时开始下载验证码图片
+                captcha_url = LoginPage.find_captcha_url(response.text) if Config.CAPTCHA_PREFETCH else None
+                if captcha_url:
+                    prefetched = asyncio.ensure_future(self.prefetch_captcha(captcha_url))
+                page = LoginPage(response.text)
+
+                if not page.form_found:
+                    self.logger.error("未找到登录表单，重试(%s)", attempt)
+                    continue
+                if not page.formhash:
+                    self.logger.error("未找到登录表单的formhash字段，重试(%s)", attempt)
+                    continue
+
+                login_data = page.login_data(self.username, self.password)
+                captcha_url = None
+                if page.needs_seccode:
+                    self.logger.info("检测到需要验证码，尝试自动识别验证码")
+                    if not page.captcha_src:
+                        self.logger.error("未找到验证码图片，重试(%s)", attempt)
+                        continue
+                    captcha_url = Config.BASE_URL + page.captcha_src
+
+                login_response, captcha_solution = await self.submit_login(login_data, captcha_url, prefetched)
+                prefetched = None
+                if login_response is None:
+                    self.logger.error("验证码识别失败，重试(%s)", attempt)
+                    continue
+                if '验证码错误' in login_response.text:
+                    self.logger.error("验证码错误，登录失败，重试(%s)", attempt)
+                    continue
+
+                if 'succeedhandle_' in login_response.text or await self.check_login_status():
+                    self.logger.info("账号 %s 登录成功", self.username)
+                    if captcha_solution:
+                        # 正确的结果会用于训练本地识别器的模板，在线程池中运行，不阻塞事件循环
+                        await asyncio.to_thread(get_captcha_chain().report, captcha_solution, True)
+                    await self.save_cookies()
+                    return True
+                self.logger.error("登录失败，请检查账号密码，重试(%s)", attempt)
+            except Exception as e:
+                self.logger.error("登录过程发生错误: %s，重试(%s)", e, attempt)
+            finally:
+                # 未使用的预下载任务需要取消，避免事件循环中残留任务
+                if prefetched is not None:
+                    prefetched.cancel()
+
+        self.logger.error("登录失败，重试次数已用尽")
+        return False
+
+    async def prefetch_captcha(self, captcha_url):
+        """在后台任务中下载验证码图片"""
+        with self.metrics.phase('captcha', self.username):
+            return await self.request('GET', captcha_url)
+
+    async def fetch_sign_page(self):
+        """请求并解析签到页面，结果缓存到self.sign_page"""
+        response = await self.request('GET', Config.SIGN_URL)
+        self.sign_page = SignPage(response.text)
+        return self.sign_page
+
+    @timed_phase('sign_status')
+    async def check_sign_status(self):
+        """检查签到状态，优先使用本次运行中已解析的签到页面，带重试机制"""
+        async for attempt in self.retry.attempts_async('sign_status'):
+            try:
+                if self.sign_page is None or not self.sign_page.sign_text:
+                    await self.fetch_sign_page()
+                if not self.sign_page.sign_text:
+                    self.logger.error("未找到签到按钮，重试(%s)", attempt)
+                    continue
+                return self.sign_page.sign_text, self.sign_page.sign_param
+            except Exception as e:
+                self.logger.error("检查签到状态失败: %s，重试(%s)", e, attempt)
+
+        self.logger.error("检查签到状态失败，重试次数已用尽")
+        return None, None
+
+    @timed_phase('sign')
+    async def do_sign(self, sign_param):
+        """执行签到，带重试机制"""
+        async for attempt in self.retry.attempts_async('sign'):
+            try:
+                response = await self.request('GET', f"{Config.SIGN_URL}&sign={sign_param}")
+                if response.status_code != 200:
+                    self.logger.error("签到请求失败，状态码: %s，重试(%s)", response.status_code, attempt)
+                    continue
+
+                # 优先解析签到请求的响应，响应中没有签到按钮时再重新获取签到页面
+                page = SignPage(response.text)
+                if not page.sign_text:
+                    page = await self.fetch_sign_page()
+                else:
+                    self.sign_page = page
+
+                if page.sign_text == "今日已打卡":
+                    self.logger.info("签到成功")
+                    return True
+                self.logger.error("签到请求已发送，但状态未更新，重试(%s)", attempt)
+            except Exception as e:
+                self.logger.error("签到过程发生错误: %s，重试(%s)", e, attempt)
+
+        self.logger.error("签到失败，重试次数已用尽")
+        return False
+
+    @timed_phase('sign_info')
+    async def get_sign_info(self):
+        """获取签到信息，优先使用本次运行中已解析的签到页面，带重试机制"""
+        async for attempt in self.retry.attempts_async('sign_info'):
+            try:
+                if self.sign_page is None or not self.sign_page.sign_info:
+                    await self.fetch_sign_page()
+                if not self.sign_page.sign_info:
+                    self.logger.error("未找到签到信息区域，重试(%s)", attempt)
+                    continue
+                return dict(self.sign_page.sign_info)
+            except Exception as e:
+                self.logger.error("获取签到信息失败: %s，重试(%s)", e, attempt)
+
+        self.logger.error("获取签到信息失败，重试次数已用尽")
+        return {}
+
+    async def run(self, deadline=None, metrics=None):
+        """运行签到流程，所有重试受同一个截止时间约束，各阶段的耗时记录到metrics"""
+        if metrics is not None:
+            self.metrics = metrics
+        deadline = (deadline or Deadline(Config.RUN_DEADLINE)).child(Config.ACCOUNT_TIME_BUDGET)
+        self.retry = RetryPolicy(deadline, self.logger)
+        self.sign_page = None
+        if not len(self.cookie_jar):
+            await self.load_cookies()
+
+        if not await self.check_login_status() and not await self.login():
+            self.logger.error("登录失败，签到流程终止")
+            return False
+
+        sign_text, sign_param = await self.check_sign_status()
+        if sign_text is None or sign_param is None:
+            self.logger.error("获取签到状态失败，签到流程终止")
+            return False
+
+        self.logger.info("当前签到状态: %s", sign_text)
+        if sign_text == "点击打卡":
+            self.logger.info("开始执行签到...")
+            return await self.do_sign(sign_param)
+        elif sign_text == "今日已打卡":
+            self.logger.info("今日已签到，无需重复签到")
+            return True
+        self.logger.warning("未知的签到状态: %s，签到流程终止", sign_text)
+        return False
+
+    async def collect(self, deadline=None, metrics=None):
+        """运行签到流程并获取签到信息，返回与FNSignIn.collect相同格式的签到结果"""
+        result = {
+            'username': self.username, 'success': False, 'sign_info': {}, 'error': None, 'timeout': False,
+            'cached': False,
+        }
+        try:
+            result['success'] = await self.run(deadline, metrics)
+            if result['success']:
+                result['sign_info'] = await self.get_sign_info()
+        except Exception as e:
+            self.logger.error("签到流程发生错误: %s", e)
+            result['error'] = str(e)
+
+        if not result['success'] and self.retry.deadline.expired:
+            self.logger.error("签到耗时超过时间预算，已中止")
+            result['timeout'] = True
+            result['error'] = result['error'] or "签到超时"
+        return result
+
+
+class AsyncSignEngine(SignEngine):
+    """基于asyncio的多账号签到引擎
+
+    所有账号在同一个事件循环中运行，共享一个连接池，同时进行的账号数由ASYNC_CONCURRENCY限制，
+    账号数量增加时线程数不变。事件循环、连接池和签到实例在多次运行之间复用，使用完毕后调用close()。
+    """
+
+    def __init__(self, accounts, concurrency=None):
+        super().__init__(accounts)
+        self.concurrency = concurrency or Config.ASYNC_CONCURRENCY
+        # 首次运行时创建，aiohttp的Session只能在创建它的事件循环中使用
+        self.loop = None
+        self.connector = None
+
+    def async_client(self, username, password, connector):
+        """返回账号的异步签到实例，需要在事件循环中调用"""
+        client = self.clients.get(username)
+        if client is None or client.password != password:
+            client = self.clients[username] = AsyncFNSignIn(username, password, connector)
+        return client
+
+    async def sign_account_async(self, username, password, deadline, connector, semaphore):
+        async with semaphore:
+            return await self.async_client(username, password, connector).collect(deadline, self.metrics)
+
+    async def sign_all_async(self, accounts):
+        """并发签到所有账号，按账号顺序返回每个账号的签到结果"""
+        import asyncio
+        aiohttp = import_aiohttp()
+        concurrency = max(1, min(self.concurrency, len(accounts)))
+        logger.info("共%s个账号，异步并发签到，最多同时签到%s个账号", len(accounts), concurrency)
+        deadline = Deadline(Config.RUN_DEADLINE)
+        semaphore = asyncio.Semaphore(concurrency)
+        if self.connector is None:
+            self.connector = aiohttp.TCPConnector(limit=max(1, min(self.concurrency, len(self.accounts))))
+        results = await asyncio.gather(*(
+            self.sign_account_async(username, password, deadline, self.connector, semaphore)
+            for username, password in accounts
+        ))
+        return list(results)
+
+    def sign_all(self, accounts):
+        import asyncio
+        if self.loop is None:
+            self.loop = asyncio.new_event_loop()
+        return self.loop.run_until_complete(self.sign_all_async(accounts))
+
+    async def close_async(self):
+        for client in self.clients.values():
+            await client.close()
+        self.clients.clear()
+        if self.connector is not None:
+            await self.connector.close()
+            self.connector = None
+
+    def close(self):
+        """关闭所有签到实例、连接池和事件循环"""
+        if self.loop is None:
+            return
+        try:
+            self.loop.run_until_complete(self.close_async())
+            self.loop.run_until_complete(self.loop.shutdown_default_executor())
+        finally:
+            self.loop.close()
+            self.loop = None
+
+
+class SignDaemon:
+    """常驻运行的签到调度器
+
+    每个账号每天在DAEMON_TIME之后的随机时间签到，随机延后的时间由账号和日期决定，重启后保持不变。
+    签到失败的账号当天按退避间隔重试DAEMON_RETRIES次。签到实例、Session和access_token在多次签到之间保留在内存中。
+    """
+
+    def __init__(self, accounts, use_async=False):
+        self.engine = AsyncSignEngine(accounts) if use_async else SignEngine(accounts)
+        self.stop_event = threading.Event()
+        # 账号当天连续失败的次数
+        self.failures = {}
+
+    @staticmethod
+    def scheduled_time(username, day):
+        """账号在指定日期的签到时间"""
+        hour, minute = map(int, Config.DAEMON_TIME.split(':'))
+        offset = random.Random(f'{username}:{day.isoformat()}').uniform(0, Config.DAEMON_JITTER)
+        return datetime.combine(day, dtime(hour, minute)) + timedelta(seconds=offset)
+
+    def next_time(self, username, after):
+        """账号在指定时间之后的下一次签到时间"""
+        day = after.date()
+        while self.scheduled_time(username, day) <= after:
+            day += timedelta(days=1)
+        return self.scheduled_time(username, day)
+
+    def reschedule(self, username, success, now):
+        """签到后的下一次签到时间，失败时当天按退避间隔重试"""
+        if not success:
+            failures = self.failures.get(username, 0) + 1
+            retry_at = now + timedelta(seconds=Config.DAEMON_RETRY_DELAY * 2 ** (failures - 1))
+            if failures <= Config.DAEMON_RETRIES and retry_at.date() == now.date():
+                self.failures[username] = failures
+                logger.warning("签到失败，将在%s进行第%s次重试", retry_at.strftime('%H:%M:%S'), failures,
+                               extra={'account': username})
+                return retry_at
+        self.failures.pop(username, None)
+        return self.next_time(username, now)
+
+    def stop(self, *args):
+        logger.info("收到退出信号，签到调度器即将停止")
+        self.stop_event.set()
+
+    def run_forever(self):
+        """按计划签到，直到收到退出信号"""
+        now = datetime.now()
+        # 今天的签到时间已过时立即签到，之后按每天的计划时间签到
+        schedule = {}
+        for username, _ in self.engine.accounts:
+            slot = self.scheduled_time(username, now.date())
+            schedule[username] = slot if slot > now else now
+        logger.info("签到调度器已启动，共%s个账号", len(schedule))
+
+        while not self.stop_event.is_set():
+            now = datetime.now()
+            due = [(username, password) for username, password in self.engine.accounts if schedule[username] <= now]
+            if due:
+                # 单次签到或通知出错时只记录日志，调度器继续运行
+                succeeded = set()
+                try:
+                    results = self.engine.run(due)
+                    succeeded = {result['username'] for result in results if result['success']}
+                    self.engine.notify(results)
+                except Exception as e:
+                    logger.error("签到调度过程发生错误: %s", e, exc_info=True)
+                now = datetime.now()
+                for username, _ in due:
+                    schedule[username] = self.reschedule(username, username in succeeded, now)
+                    logger.info("下次签到时间: %s", schedule[username].strftime('%Y-%m-%d %H:%M:%S'),
+                                extra={'account': username})
+                continue
+
+            # 最多休眠一小时，避免系统休眠或修改时间后错过签到
+            wait_seconds = (min(schedule.values()) - now).total_seconds()
+            self.stop_event.wait(min(max(wait_seconds, 0), 3600))
+        logger.info("签到调度器已停止")
+
+
+def run_once(use_async=False):
+    """签到所有账号一次并发送通知，全部成功时返回True"""
+    accounts = load_accounts()
+    if not accounts:
+        logger.error("未配置账号，请设置FN_USERNAME/FN_PASSWORD或FN_ACCOUNTS环境变量")
+        return False
+    # 创建签到引擎并发签到所有账号
+    engine = AsyncSignEngine(accounts) if use_async else SignEngine(accounts)
+    try:
+        results = engine.run()
+        engine.notify(results)
+    finally:
+        engine.close()
+    return all(item['success'] for item in results)
+
+
+def run_daemon(use_async=False):
+    """常驻运行，每天按计划签到"""
+    accounts = load_accounts()
+    if not accounts:
+        logger.error("未配置账号，请设置FN_USERNAME/FN_PASSWORD或FN_ACCOUNTS环境变量")
+        return False
+    import signal
+    daemon = SignDaemon(accounts, use_async)
+    signal.signal(signal.SIGTERM, daemon.stop)
+    try:
+        daemon.run_forever()
+    finally:
+        daemon.engine.close()
+    return True
+
+
+def month_arg(value):
+    """命令行参数--month的类型检查，格式为YYYY-MM"""
+    import argparse
+    try:
+        datetime.strptime(value, '%Y-%m')
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"月份格式应为YYYY-MM: {value}")
+    return value
+
+
+def show_history(account=None, month=None, as_json=False):
+    """输出本地签到历史的统计，month格式为YYYY-MM，只统计该月"""
+    history = get_sign_history()
+    accounts = [account] if account else history.accounts()
+    start = end = None
+    if month:
+        start = datetime.strptime(month, '%Y-%m').date()
+        end = (start + timedelta(days=31)).replace(day=1) - timedelta(days=1)
+    reports = [history.report(name, start, end) for name in accounts]
+
+    if as_json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+        return bool(reports)
+    if not reports:
+        print("没有签到历史记录")
+        return False
+
+    for report in reports:
+        print(f"【{report['account']}】")
+        if not report['sign_days']:
+            print("  没有签到记录")
+            continue
+        longest = report['longest_streak']
+        print(f"  签到{report['sign_days']}天（{report['first_day']} ~ {report['last_day']}），"
+              f"当前连续{report['current_streak']}天，"
+              f"最长连续{longest['days']}天（{longest['start']} ~ {longest['end']}）")
+        if report['latest']:
+            print('  论坛最近数据: ' + '，'.join(
+                f"{key}: {value}天" if isinstance(value, int) else f"{key}: {value}"
+                for key, value in report['latest'].items() if value is not None
+            ))
+        print('  每月签到: ' + '，'.join(f"{key} {value}天" for key, value in report['monthly'].items()))
+        if report['gaps']:
+            print(f"  未签到{sum(gap['days'] for gap in report['gaps'])}天: " + '，'.join(
+                gap['start'] if gap['days'] == 1 else f"{gap['start']} ~ {gap['end']}" for gap in report['gaps']
+            ))
+    return True
 
 
 if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description='飞牛论坛自动签到')
+    parser.add_argument('--daemon', action='store_true', help='常驻运行，每天按计划时间自动签到，无需配置定时任务')
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help='使用asyncio在单个线程中并发签到所有账号，需要安装aiohttp')
+    parser.add_argument('--force', action='store_true', help='忽略本地签到记录，今日已签到的账号也重新检查')
+    subparsers = parser.add_subparsers(dest='command')
+    history_parser = subparsers.add_parser('history', help='查看本地保存的签到历史统计：连续签到、未签到日期和每月签到天数')
+    history_parser.add_argument('--account', help='只查看指定账号')
+    history_parser.add_argument('--month', type=month_arg, help='只统计指定月份，格式为YYYY-MM')
+    history_parser.add_argument('--json', dest='as_json', action='store_true', help='以JSON格式输出')
+    args = parser.parse_args()
+    if args.force:
+        Config.FORCE = True
+    if args.command == 'history':
+        raise SystemExit(0 if show_history(args.account, args.month, args.as_json) else 1)
+    setup_logging()
     try:
         # 设置更详细的日志级别，便于调试
         if os.environ.get('DEBUG') == '1':
             logger.setLevel(logging.DEBUG)
             logger.debug("调试模式已启用")
 
-        # # 创建签到实例并运行
-        sign = FNSignIn()
-        result = sign.push_run()
+        result = run_daemon(args.use_async) if args.daemon else run_once(args.use_async)
 
         # 输出最终结果
         if result:
@@ -641,7 +3208,7 @@ if __name__ == "__main__":
     except KeyboardInterrupt:
         logger.info("脚本被用户中断")
     except Exception as e:
-        logger.error(f"脚本运行出错: {e}")
+        logger.error("脚本运行出错: %s", e)
         # 输出详细的异常堆栈信息
         import traceback
         logger.error(traceback.format_exc())
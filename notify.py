@@ -1,18 +1,17 @@
 #!/usr/bin/env python3
 # _*_ coding:utf-8 _*_
+import asyncio
 import base64
 import hashlib
-import hmac
 import json
 import os
+import queue
+import random
 import re
 import threading
 import time
 import urllib.parse
-import smtplib
-from email.mime.text import MIMEText
-from email.header import Header
-from email.utils import formataddr
+from concurrent.futures import Executor, Future, wait
 
 import requests
 
@@ -34,6 +33,13 @@ def print(text, *args, **kw):
 # fmt: off
 push_config = {
     'HITOKOTO': True,                  # 启用一言（随机句子）
+    'HITOKOTO_CACHE': '',               # 一言缓存文件，默认为本文件所在目录下的 hitokoto_cache.json
+    'HITOKOTO_TTL': 604800,             # 缓存的一言的有效期(秒)
+    'HITOKOTO_POOL': 20,                # 缓存的一言数量
+    'HITOKOTO_WAIT': 0.5,               # 没有可用缓存时等待一言接口的时间(秒)，超时使用内置的句子
+
+    'PUSH_TIMEOUT': 15,                 # 单个推送渠道每次请求的超时时间(秒)
+    'PUSH_DEADLINE': 60,                # 所有推送渠道的总等待时间(秒)，超时后不再等待未完成的渠道
 
     'BARK_PUSH': '',                    # bark IP 或设备码，例：https://api.day.app/DxHcxxxxxRxxxxxxcm/
     'BARK_ARCHIVE': '',                 # bark 推送是否存档
@@ -90,6 +96,7 @@ push_config = {
     'QYWX_ORIGIN': '',                  # 企业微信代理地址
 
     'QYWX_AM': '',                      # 企业微信应用
+    'QYWX_TOKEN_CACHE': '',             # 企业微信应用 access_token 缓存文件，为空时只缓存在内存中
 
     'QYWX_KEY': '',                     # 企业微信机器人
 
@@ -142,13 +149,160 @@ for k in push_config:
         v = os.getenv(k)
         push_config[k] = v
 
+# 推送渠道共用的线程池，最多同时推送 PUSH_WORKERS 个渠道
+PUSH_WORKERS = 8
+_executor = None
+_executor_lock = threading.Lock()
+
+# 推送渠道共用的 Session，同一地址的多次推送复用连接
+_session = None
+_session_lock = threading.Lock()
+
+
+def push_timeout() -> float:
+    """
+    单个推送渠道每次请求的超时时间(秒)。
+    """
+    return float(push_config.get("PUSH_TIMEOUT") or 15)
+
+
+def push_deadline() -> float:
+    """
+    所有推送渠道的总等待时间(秒)。
+    """
+    return float(push_config.get("PUSH_DEADLINE") or 60)
+
+
+def channel_timeout(mode, timeouts: dict = None) -> float:
+    """
+    渠道的最长等待时间：timeouts 中按渠道函数名指定，未指定时为 PUSH_DEADLINE，不超过 PUSH_DEADLINE。
+    """
+    deadline = push_deadline()
+    return min(float((timeouts or {}).get(mode.__name__, deadline)), deadline)
+
+
+class PushSession(requests.Session):
+    """
+    推送渠道共用的 Session，请求未指定 timeout 时使用 PUSH_TIMEOUT。
+    """
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault("timeout", push_timeout())
+        return super().request(method, url, *args, **kwargs)
+
+
+def get_session() -> PushSession:
+    """
+    返回推送渠道共用的 Session。
+    连接池大小与线程池相同；连接失败时自动重试两次。
+    返回 429、502、503、504 时只重试 GET 等幂等请求，POST 可能已被处理，重试会导致重复推送；
+    不使用 Retry-After 头，避免服务端要求的等待时间超过 PUSH_DEADLINE。
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                from requests.adapters import HTTPAdapter
+                from urllib3.util.retry import Retry
+
+                retry = Retry(
+                    total=2,
+                    connect=2,
+                    read=0,
+                    status=2,
+                    backoff_factor=0.5,
+                    status_forcelist=(429, 502, 503, 504),
+                    raise_on_status=False,
+                    respect_retry_after_header=False,
+                )
+                adapter = HTTPAdapter(
+                    pool_connections=PUSH_WORKERS,
+                    pool_maxsize=PUSH_WORKERS,
+                    max_retries=retry,
+                )
+                session = PushSession()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def channel_proxies(prefix: str):
+    """
+    读取渠道的代理配置 {prefix}_PROXY_HOST、{prefix}_PROXY_PORT、{prefix}_PROXY_AUTH，
+    返回 requests 的 proxies 参数，未配置代理时返回 None。
+    """
+    host = push_config.get(f"{prefix}_PROXY_HOST")
+    port = push_config.get(f"{prefix}_PROXY_PORT")
+    if not host or not port:
+        return None
+    auth = push_config.get(f"{prefix}_PROXY_AUTH")
+    if auth and "@" not in host:
+        host = f"{auth}@{host}"
+    proxy = f"http://{host}:{port}"
+    return {"http": proxy, "https": proxy}
+
+
+class PushExecutor(Executor):
+    """
+    推送渠道使用的线程池，按需创建最多 max_workers 个工作线程。
+    与 ThreadPoolExecutor 不同，工作线程是守护线程，进程退出时不等待：
+    超过截止时间仍未完成的渠道不会让进程在 send 返回后继续挂起，这些渠道的推送随进程退出而放弃。
+    """
+
+    def __init__(self, max_workers: int, thread_name_prefix: str = "notify"):
+        self.max_workers = max_workers
+        self.thread_name_prefix = thread_name_prefix
+        self.queue = queue.SimpleQueue()
+        self.threads = []
+        self.idle = threading.Semaphore(0)
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        future = Future()
+        self.queue.put((future, fn, args, kwargs))
+        with self.lock:
+            # 没有空闲线程且未达到上限时创建新线程
+            if not self.idle.acquire(timeout=0) and len(self.threads) < self.max_workers:
+                thread = threading.Thread(
+                    target=self.worker,
+                    name=f"{self.thread_name_prefix}_{len(self.threads)}",
+                    daemon=True,
+                )
+                thread.start()
+                self.threads.append(thread)
+        return future
+
+    def worker(self) -> None:
+        while True:
+            future, fn, args, kwargs = self.queue.get()
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(fn(*args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+            del future, fn, args, kwargs
+            self.idle.release()
+
+
+def get_executor() -> PushExecutor:
+    """
+    返回推送渠道共用的线程池，首次推送时创建，之后的推送复用。
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = PushExecutor(max_workers=PUSH_WORKERS)
+    return _executor
+
 
-def bark(title: str, content: str) -> None:
+def bark(title: str, content: str) -> bool:
     """
     使用 bark 推送消息。
     """
     if not push_config.get("BARK_PUSH"):
-        return
+        return False
     print("bark 服务启动")
 
     if push_config.get("BARK_PUSH").startswith("http"):
@@ -177,31 +331,36 @@ def bark(title: str, content: str) -> None:
     ):
         data[bark_params.get(pair[0])] = pair[1]
     headers = {"Content-Type": "application/json;charset=utf-8"}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
+    response = get_session().post(
+        url=url, data=json.dumps(data), headers=headers
     ).json()
 
     if response["code"] == 200:
         print("bark 推送成功！")
+        return True
     else:
         print("bark 推送失败！")
+        return False
 
 
-def console(title: str, content: str) -> None:
+def console(title: str, content: str) -> bool:
     """
     使用 控制台 推送消息。
     """
     print(f"{title}\n\n{content}")
+    return True
 
 
-def dingding_bot(title: str, content: str) -> None:
+def dingding_bot(title: str, content: str) -> bool:
     """
     使用 钉钉机器人 推送消息。
     """
     if not push_config.get("DD_BOT_SECRET") or not push_config.get("DD_BOT_TOKEN"):
-        return
+        return False
     print("钉钉机器人 服务启动")
 
+    import hmac
+
     timestamp = str(round(time.time() * 1000))
     secret_enc = push_config.get("DD_BOT_SECRET").encode("utf-8")
     string_to_sign = "{}\n{}".format(timestamp, push_config.get("DD_BOT_SECRET"))
@@ -213,57 +372,63 @@ def dingding_bot(title: str, content: str) -> None:
     url = f'https://oapi.dingtalk.com/robot/send?access_token={push_config.get("DD_BOT_TOKEN")}&timestamp={timestamp}&sign={sign}'
     headers = {"Content-Type": "application/json;charset=utf-8"}
     data = {"msgtype": "text", "text": {"content": f"{title}\n\n{content}"}}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
+    response = get_session().post(
+        url=url, data=json.dumps(data), headers=headers
     ).json()
 
     if not response["errcode"]:
         print("钉钉机器人 推送成功！")
+        return True
     else:
         print("钉钉机器人 推送失败！")
+        return False
 
 
-def feishu_bot(title: str, content: str) -> None:
+def feishu_bot(title: str, content: str) -> bool:
     """
     使用 飞书机器人 推送消息。
     """
     if not push_config.get("FSKEY"):
-        return
+        return False
     print("飞书 服务启动")
 
     url = f'https://open.feishu.cn/open-apis/bot/v2/hook/{push_config.get("FSKEY")}'
     data = {"msg_type": "text", "content": {"text": f"{title}\n\n{content}"}}
-    response = requests.post(url, data=json.dumps(data)).json()
+    response = get_session().post(url, data=json.dumps(data)).json()
 
     if response.get("StatusCode") == 0 or response.get("code") == 0:
         print("飞书 推送成功！")
+        return True
     else:
         print("飞书 推送失败！错误信息如下：\n", response)
+        return False
 
 
-def go_cqhttp(title: str, content: str) -> None:
+def go_cqhttp(title: str, content: str) -> bool:
     """
     使用 go_cqhttp 推送消息。
     """
     if not push_config.get("GOBOT_URL") or not push_config.get("GOBOT_QQ"):
-        return
+        return False
     print("go-cqhttp 服务启动")
 
     url = f'{push_config.get("GOBOT_URL")}?access_token={push_config.get("GOBOT_TOKEN")}&{push_config.get("GOBOT_QQ")}&message=标题:{title}\n内容:{content}'
-    response = requests.get(url).json()
+    response = get_session().get(url).json()
 
     if response["status"] == "ok":
         print("go-cqhttp 推送成功！")
+        return True
     else:
         print("go-cqhttp 推送失败！")
+        return False
 
 
-def gotify(title: str, content: str) -> None:
+def gotify(title: str, content: str) -> bool:
     """
     使用 gotify 推送消息。
     """
     if not push_config.get("GOTIFY_URL") or not push_config.get("GOTIFY_TOKEN"):
-        return
+        return False
     print("gotify 服务启动")
 
     url = f'{push_config.get("GOTIFY_URL")}/message?token={push_config.get("GOTIFY_TOKEN")}'
@@ -272,39 +437,43 @@ def gotify(title: str, content: str) -> None:
         "message": content,
         "priority": push_config.get("GOTIFY_PRIORITY"),
     }
-    response = requests.post(url, data=data).json()
+    response = get_session().post(url, data=data).json()
 
     if response.get("id"):
         print("gotify 推送成功！")
+        return True
     else:
         print("gotify 推送失败！")
+        return False
 
 
-def iGot(title: str, content: str) -> None:
+def iGot(title: str, content: str) -> bool:
     """
     使用 iGot 推送消息。
     """
     if not push_config.get("IGOT_PUSH_KEY"):
-        return
+        return False
     print("iGot 服务启动")
 
     url = f'https://push.hellyw.com/{push_config.get("IGOT_PUSH_KEY")}'
     data = {"title": title, "content": content}
     headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    response = requests.post(url, data=data, headers=headers).json()
+    response = get_session().post(url, data=data, headers=headers).json()
 
     if response["ret"] == 0:
         print("iGot 推送成功！")
+        return True
     else:
         print(f'iGot 推送失败！{response["errMsg"]}')
+        return False
 
 
-def serverJ(title: str, content: str) -> None:
+def serverJ(title: str, content: str) -> bool:
     """
     通过 serverJ 推送消息。
     """
     if not push_config.get("PUSH_KEY"):
-        return
+        return False
     print("serverJ 服务启动")
 
     data = {"text": title, "desp": content.replace("\n", "\n\n")}
@@ -316,20 +485,22 @@ def serverJ(title: str, content: str) -> None:
     else:
         url = f'https://sctapi.ftqq.com/{push_config.get("PUSH_KEY")}.send'
 
-    response = requests.post(url, data=data).json()
+    response = get_session().post(url, data=data).json()
 
     if response.get("errno") == 0 or response.get("code") == 0:
         print("serverJ 推送成功！")
+        return True
     else:
         print(f'serverJ 推送失败！错误码：{response["message"]}')
+        return False
 
 
-def pushdeer(title: str, content: str) -> None:
+def pushdeer(title: str, content: str) -> bool:
     """
     通过PushDeer 推送消息
     """
     if not push_config.get("DEER_KEY"):
-        return
+        return False
     print("PushDeer 服务启动")
     data = {
         "text": title,
@@ -341,37 +512,41 @@ def pushdeer(title: str, content: str) -> None:
     if push_config.get("DEER_URL"):
         url = push_config.get("DEER_URL")
 
-    response = requests.post(url, data=data).json()
+    response = get_session().post(url, data=data).json()
 
     if len(response.get("content").get("result")) > 0:
         print("PushDeer 推送成功！")
+        return True
     else:
         print("PushDeer 推送失败！错误信息：", response)
+        return False
 
 
-def chat(title: str, content: str) -> None:
+def chat(title: str, content: str) -> bool:
     """
     通过Chat 推送消息
     """
     if not push_config.get("CHAT_URL") or not push_config.get("CHAT_TOKEN"):
-        return
+        return False
     print("chat 服务启动")
     data = "payload=" + json.dumps({"text": title + "\n" + content})
     url = push_config.get("CHAT_URL") + push_config.get("CHAT_TOKEN")
-    response = requests.post(url, data=data)
+    response = get_session().post(url, data=data)
 
     if response.status_code == 200:
         print("Chat 推送成功！")
+        return True
     else:
         print("Chat 推送失败！错误信息：", response)
+        return False
 
 
-def pushplus_bot(title: str, content: str) -> None:
+def pushplus_bot(title: str, content: str) -> bool:
     """
     通过 pushplus 推送消息。
     """
     if not push_config.get("PUSH_PLUS_TOKEN"):
-        return
+        return False
     print("PUSHPLUS 服务启动")
 
     url = "https://www.pushplus.plus/send"
@@ -388,7 +563,7 @@ def pushplus_bot(title: str, content: str) -> None:
     }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = get_session().post(url=url, data=body, headers=headers).json()
 
     code = response["code"]
     if code == 200:
@@ -396,27 +571,31 @@ def pushplus_bot(title: str, content: str) -> None:
         print(
             "注意：请求成功并不代表推送成功，如未收到消息，请到pushplus官网使用流水号查询推送最终结果"
         )
+        return True
     elif code == 900 or code == 903 or code == 905 or code == 999:
         print(response["msg"])
+        return False
 
     else:
         url_old = "http://pushplus.hxtrip.com/send"
         headers["Accept"] = "application/json"
-        response = requests.post(url=url_old, data=body, headers=headers).json()
+        response = get_session().post(url=url_old, data=body, headers=headers).json()
 
         if response["code"] == 200:
             print("PUSHPLUS(hxtrip) 推送成功！")
+            return True
 
         else:
             print("PUSHPLUS 推送失败！")
+            return False
 
 
-def weplus_bot(title: str, content: str) -> None:
+def weplus_bot(title: str, content: str) -> bool:
     """
     通过 微加机器人 推送消息。
     """
     if not push_config.get("WE_PLUS_BOT_TOKEN"):
-        return
+        return False
     print("微加机器人 服务启动")
 
     template = "txt"
@@ -434,42 +613,46 @@ def weplus_bot(title: str, content: str) -> None:
     }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = get_session().post(url=url, data=body, headers=headers).json()
 
     if response["code"] == 200:
         print("微加机器人 推送成功！")
+        return True
     else:
         print("微加机器人 推送失败！")
+        return False
 
 
-def qmsg_bot(title: str, content: str) -> None:
+def qmsg_bot(title: str, content: str) -> bool:
     """
     使用 qmsg 推送消息。
     """
     if not push_config.get("QMSG_KEY") or not push_config.get("QMSG_TYPE"):
-        return
+        return False
     print("qmsg 服务启动")
 
     url = f'https://qmsg.zendee.cn/{push_config.get("QMSG_TYPE")}/{push_config.get("QMSG_KEY")}'
     payload = {"msg": f'{title}\n\n{content.replace("----", "-")}'.encode("utf-8")}
-    response = requests.post(url=url, params=payload).json()
+    response = get_session().post(url=url, params=payload).json()
 
     if response["code"] == 0:
         print("qmsg 推送成功！")
+        return True
     else:
         print(f'qmsg 推送失败！{response["reason"]}')
+        return False
 
 
-def wecom_app(title: str, content: str) -> None:
+def wecom_app(title: str, content: str) -> bool:
     """
     通过 企业微信 APP 推送消息。
     """
     if not push_config.get("QYWX_AM"):
-        return
+        return False
     QYWX_AM_AY = re.split(",", push_config.get("QYWX_AM"))
     if 4 < len(QYWX_AM_AY) > 5:
         print("QYWX_AM 设置错误!!")
-        return
+        return False
     print("企业微信 APP 服务启动")
 
     corpid = QYWX_AM_AY[0]
@@ -490,11 +673,21 @@ def wecom_app(title: str, content: str) -> None:
 
     if response == "ok":
         print("企业微信推送成功！")
+        return True
     else:
         print("企业微信推送失败！错误信息如下：\n", response)
+        return False
 
 
 class WeCom:
+    # access_token 缓存，按 (corpid, agentid) 区分，所有 WeCom 实例共用
+    tokens = {}
+    tokens_lock = threading.Lock()
+    # 距离过期不足该时间(秒)时重新获取 access_token
+    REFRESH_AHEAD = 300
+    # access_token 无效或已过期的错误码
+    INVALID_TOKEN_CODES = (40001, 40014, 42001)
+
     def __init__(self, corpid, corpsecret, agentid):
         self.CORPID = corpid
         self.CORPSECRET = corpsecret
@@ -503,20 +696,101 @@ class WeCom:
         if push_config.get("QYWX_ORIGIN"):
             self.ORIGIN = push_config.get("QYWX_ORIGIN")
 
-    def get_access_token(self):
-        url = f"{self.ORIGIN}/cgi-bin/gettoken"
-        values = {
-            "corpid": self.CORPID,
-            "corpsecret": self.CORPSECRET,
-        }
-        req = requests.post(url, params=values)
-        data = json.loads(req.text)
-        return data["access_token"]
+    @property
+    def token_key(self) -> str:
+        return f"{self.CORPID}:{self.AGENTID}"
 
-    def send_text(self, message, touser="@all"):
-        send_url = (
-            f"{self.ORIGIN}/cgi-bin/message/send?access_token={self.get_access_token()}"
+    @classmethod
+    def load_tokens(cls) -> dict:
+        path = push_config.get("QYWX_TOKEN_CACHE")
+        if not path:
+            return {}
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                tokens = json.load(f)
+            return tokens if isinstance(tokens, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    @classmethod
+    def save_tokens(cls) -> None:
+        path = push_config.get("QYWX_TOKEN_CACHE")
+        if not path:
+            return
+        try:
+            # 合并其他进程写入的 access_token
+            tokens = cls.load_tokens()
+            tokens.update(cls.tokens)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(tokens, f)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"企业微信 access_token 缓存保存失败！{e}")
+
+    def valid(self, token) -> bool:
+        return (
+            isinstance(token, dict)
+            and bool(token.get("access_token"))
+            and token.get("expires_at", 0) - self.REFRESH_AHEAD > time.time()
         )
+
+    def cached_token(self):
+        """
+        返回未过期的 access_token，内存中没有时读取缓存文件（可能由其他进程写入）。
+        """
+        token = self.tokens.get(self.token_key)
+        if not self.valid(token):
+            token = self.load_tokens().get(self.token_key)
+            if not self.valid(token):
+                return None
+            self.tokens[self.token_key] = token
+        return token["access_token"]
+
+    def get_access_token(self, invalid=None):
+        """
+        返回缓存的 access_token，即将过期或与 invalid（企业微信报告失效的 access_token）相同时重新获取。
+        """
+        token = self.cached_token()
+        if token and token != invalid:
+            return token
+        with self.tokens_lock:
+            # 等待锁期间其他线程可能已经获取了新的 access_token
+            token = self.cached_token()
+            if token and token != invalid:
+                return token
+            url = f"{self.ORIGIN}/cgi-bin/gettoken"
+            values = {
+                "corpid": self.CORPID,
+                "corpsecret": self.CORPSECRET,
+            }
+            req = get_session().post(url, params=values)
+            data = json.loads(req.text)
+            if not data.get("access_token"):
+                raise ValueError(f"获取企业微信 access_token 失败：{data.get('errmsg', data)}")
+            self.tokens[self.token_key] = {
+                "access_token": data["access_token"],
+                "expires_at": time.time() + int(data.get("expires_in", 7200)),
+            }
+            self.save_tokens()
+            return data["access_token"]
+
+    def send(self, send_values):
+        """
+        发送应用消息，access_token 失效时重新获取一次后重试。
+        """
+        send_msges = bytes(json.dumps(send_values), "utf-8")
+        access_token = self.get_access_token()
+        for retry in (False, True):
+            send_url = f"{self.ORIGIN}/cgi-bin/message/send?access_token={access_token}"
+            respone = get_session().post(send_url, send_msges)
+            respone = respone.json()
+            if retry or respone.get("errcode") not in self.INVALID_TOKEN_CODES:
+                break
+            access_token = self.get_access_token(invalid=access_token)
+        return respone["errmsg"]
+
+    def send_text(self, message, touser="@all"):
         send_values = {
             "touser": touser,
             "msgtype": "text",
@@ -524,15 +798,9 @@ class WeCom:
             "text": {"content": message},
             "safe": "0",
         }
-        send_msges = bytes(json.dumps(send_values), "utf-8")
-        respone = requests.post(send_url, send_msges)
-        respone = respone.json()
-        return respone["errmsg"]
+        return self.send(send_values)
 
     def send_mpnews(self, title, message, media_id, touser="@all"):
-        send_url = (
-            f"{self.ORIGIN}/cgi-bin/message/send?access_token={self.get_access_token()}"
-        )
         send_values = {
             "touser": touser,
             "msgtype": "mpnews",
@@ -550,18 +818,15 @@ class WeCom:
                 ]
             },
         }
-        send_msges = bytes(json.dumps(send_values), "utf-8")
-        respone = requests.post(send_url, send_msges)
-        respone = respone.json()
-        return respone["errmsg"]
+        return self.send(send_values)
 
 
-def wecom_bot(title: str, content: str) -> None:
+def wecom_bot(title: str, content: str) -> bool:
     """
     通过 企业微信机器人 推送消息。
     """
     if not push_config.get("QYWX_KEY"):
-        return
+        return False
     print("企业微信机器人服务启动")
 
     origin = "https://qyapi.weixin.qq.com"
@@ -571,22 +836,24 @@ def wecom_bot(title: str, content: str) -> None:
     url = f"{origin}/cgi-bin/webhook/send?key={push_config.get('QYWX_KEY')}"
     headers = {"Content-Type": "application/json;charset=utf-8"}
     data = {"msgtype": "text", "text": {"content": f"{title}\n\n{content}"}}
-    response = requests.post(
-        url=url, data=json.dumps(data), headers=headers, timeout=15
+    response = get_session().post(
+        url=url, data=json.dumps(data), headers=headers
     ).json()
 
     if response["errcode"] == 0:
         print("企业微信机器人推送成功！")
+        return True
     else:
         print("企业微信机器人推送失败！")
+        return False
 
 
-def telegram_bot(title: str, content: str) -> None:
+def telegram_bot(title: str, content: str) -> bool:
     """
     使用 telegram 机器人 推送消息。
     """
     if not push_config.get("TG_BOT_TOKEN") or not push_config.get("TG_USER_ID"):
-        return
+        return False
     print("tg 服务启动")
 
     if push_config.get("TG_API_HOST"):
@@ -601,31 +868,19 @@ def telegram_bot(title: str, content: str) -> None:
         "text": f"{title}\n\n{content}",
         "disable_web_page_preview": "true",
     }
-    proxies = None
-    if push_config.get("TG_PROXY_HOST") and push_config.get("TG_PROXY_PORT"):
-        if push_config.get("TG_PROXY_AUTH") is not None and "@" not in push_config.get(
-            "TG_PROXY_HOST"
-        ):
-            push_config["TG_PROXY_HOST"] = (
-                push_config.get("TG_PROXY_AUTH")
-                + "@"
-                + push_config.get("TG_PROXY_HOST")
-            )
-        proxyStr = "http://{}:{}".format(
-            push_config.get("TG_PROXY_HOST"), push_config.get("TG_PROXY_PORT")
-        )
-        proxies = {"http": proxyStr, "https": proxyStr}
-    response = requests.post(
-        url=url, headers=headers, params=payload, proxies=proxies
+    response = get_session().post(
+        url=url, headers=headers, params=payload, proxies=channel_proxies("TG")
     ).json()
 
     if response["ok"]:
         print("tg 推送成功！")
+        return True
     else:
         print("tg 推送失败！")
+        return False
 
 
-def aibotk(title: str, content: str) -> None:
+def aibotk(title: str, content: str) -> bool:
     """
     使用 智能微秘书 推送消息。
     """
@@ -634,7 +889,7 @@ def aibotk(title: str, content: str) -> None:
         or not push_config.get("AIBOTK_TYPE")
         or not push_config.get("AIBOTK_NAME")
     ):
-        return
+        return False
     print("智能微秘书 服务启动")
 
     if push_config.get("AIBOTK_TYPE") == "room":
@@ -653,15 +908,17 @@ def aibotk(title: str, content: str) -> None:
         }
     body = json.dumps(data).encode(encoding="utf-8")
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, data=body, headers=headers).json()
+    response = get_session().post(url=url, data=body, headers=headers).json()
     print(response)
     if response["code"] == 0:
         print("智能微秘书 推送成功！")
+        return True
     else:
         print(f'智能微秘书 推送失败！{response["error"]}')
+        return False
 
 
-def smtp(title: str, content: str) -> None:
+def smtp(title: str, content: str) -> bool:
     """
     使用 SMTP 邮件 推送消息。
     """
@@ -672,9 +929,14 @@ def smtp(title: str, content: str) -> None:
         or not push_config.get("SMTP_PASSWORD")
         or not push_config.get("SMTP_NAME")
     ):
-        return
+        return False
     print("SMTP 邮件 服务启动")
 
+    import smtplib
+    from email.header import Header
+    from email.mime.text import MIMEText
+    from email.utils import formataddr
+
     message = MIMEText(content, "plain", "utf-8")
     message["From"] = formataddr(
         (
@@ -692,9 +954,9 @@ def smtp(title: str, content: str) -> None:
 
     try:
         smtp_server = (
-            smtplib.SMTP_SSL(push_config.get("SMTP_SERVER"))
+            smtplib.SMTP_SSL(push_config.get("SMTP_SERVER"), timeout=push_timeout())
             if push_config.get("SMTP_SSL") == "true"
-            else smtplib.SMTP(push_config.get("SMTP_SERVER"))
+            else smtplib.SMTP(push_config.get("SMTP_SERVER"), timeout=push_timeout())
         )
         smtp_server.login(
             push_config.get("SMTP_EMAIL"), push_config.get("SMTP_PASSWORD")
@@ -706,16 +968,18 @@ def smtp(title: str, content: str) -> None:
         )
         smtp_server.close()
         print("SMTP 邮件 推送成功！")
+        return True
     except Exception as e:
         print(f"SMTP 邮件 推送失败！{e}")
+        return False
 
 
-def pushme(title: str, content: str) -> None:
+def pushme(title: str, content: str) -> bool:
     """
     使用 PushMe 推送消息。
     """
     if not push_config.get("PUSHME_KEY"):
-        return
+        return False
     print("PushMe 服务启动")
 
     url = (
@@ -730,15 +994,17 @@ def pushme(title: str, content: str) -> None:
         "date": push_config.get("date") if push_config.get("date") else "",
         "type": push_config.get("type") if push_config.get("type") else "",
     }
-    response = requests.post(url, data=data)
+    response = get_session().post(url, data=data)
 
     if response.status_code == 200 and response.text == "success":
         print("PushMe 推送成功！")
+        return True
     else:
         print(f"PushMe 推送失败！{response.status_code} {response.text}")
+        return False
 
 
-def chronocat(title: str, content: str) -> None:
+def chronocat(title: str, content: str) -> bool:
     """
     使用 CHRONOCAT 推送消息。
     """
@@ -747,7 +1013,7 @@ def chronocat(title: str, content: str) -> None:
         or not push_config.get("CHRONOCAT_QQ")
         or not push_config.get("CHRONOCAT_TOKEN")
     ):
-        return
+        return False
 
     print("CHRONOCAT 服务启动")
 
@@ -760,6 +1026,7 @@ def chronocat(title: str, content: str) -> None:
         "Authorization": f'Bearer {push_config.get("CHRONOCAT_TOKEN")}',
     }
 
+    success = True
     for chat_type, ids in [(1, user_ids), (2, group_ids)]:
         if not ids:
             continue
@@ -773,20 +1040,22 @@ def chronocat(title: str, content: str) -> None:
                     }
                 ],
             }
-            response = requests.post(url, headers=headers, data=json.dumps(data))
+            response = get_session().post(url, headers=headers, data=json.dumps(data))
             if response.status_code == 200:
                 if chat_type == 1:
                     print(f"QQ个人消息:{ids}推送成功！")
                 else:
                     print(f"QQ群消息:{ids}推送成功！")
             else:
+                success = False
                 if chat_type == 1:
                     print(f"QQ个人消息:{ids}推送失败！")
                 else:
                     print(f"QQ群消息:{ids}推送失败！")
+    return success
 
 
-def ntfy(title: str, content: str) -> None:
+def ntfy(title: str, content: str) -> bool:
     """
     通过 Ntfy 推送消息
     """
@@ -798,7 +1067,7 @@ def ntfy(title: str, content: str) -> None:
         return f"=?utf-8?B?{encoded_str}?="
 
     if not push_config.get("NTFY_TOPIC"):
-        return
+        return False
     print("ntfy 服务启动")
     priority = "3"
     if not push_config.get("NTFY_PRIORITY"):
@@ -820,14 +1089,16 @@ def ntfy(title: str, content: str) -> None:
         headers['Actions'] = encode_rfc2047(push_config.get("NTFY_ACTIONS"))
 
     url = push_config.get("NTFY_URL") + "/" + push_config.get("NTFY_TOPIC")
-    response = requests.post(url, data=data, headers=headers)
+    response = get_session().post(url, data=data, headers=headers)
     if response.status_code == 200:  # 使用 response.status_code 进行检查
         print("Ntfy 推送成功！")
+        return True
     else:
         print("Ntfy 推送失败！错误信息：", response.text)
+        return False
 
 
-def wxpusher_bot(title: str, content: str) -> None:
+def wxpusher_bot(title: str, content: str) -> bool:
     """
     通过 wxpusher 推送消息。
     支持的环境变量:
@@ -836,7 +1107,7 @@ def wxpusher_bot(title: str, content: str) -> None:
     - WXPUSHER_UIDS: 用户ID, 多个用英文分号;分隔
     """
     if not push_config.get("WXPUSHER_APP_TOKEN"):
-        return
+        return False
 
     url = "https://wxpusher.zjiecode.com/api/send/message"
 
@@ -860,7 +1131,7 @@ def wxpusher_bot(title: str, content: str) -> None:
     # topic_ids uids 至少有一个
     if not topic_ids and not uids:
         print("wxpusher 服务的 WXPUSHER_TOPIC_IDS 和 WXPUSHER_UIDS 至少设置一个!!")
-        return
+        return False
 
     print("wxpusher 服务启动")
 
@@ -875,12 +1146,14 @@ def wxpusher_bot(title: str, content: str) -> None:
     }
 
     headers = {"Content-Type": "application/json"}
-    response = requests.post(url=url, json=data, headers=headers).json()
+    response = get_session().post(url=url, json=data, headers=headers).json()
 
     if response.get("code") == 1000:
         print("wxpusher 推送成功！")
+        return True
     else:
         print(f"wxpusher 推送失败！错误信息：{response.get('msg')}")
+        return False
 
 
 def parse_headers(headers):
@@ -934,12 +1207,12 @@ def parse_body(body, content_type, value_format_fn=None):
     return parsed
 
 
-def custom_notify(title: str, content: str) -> None:
+def custom_notify(title: str, content: str) -> bool:
     """
     通过 自定义通知 推送消息。
     """
     if not push_config.get("WEBHOOK_URL") or not push_config.get("WEBHOOK_METHOD"):
-        return
+        return False
 
     print("自定义通知服务启动")
 
@@ -951,7 +1224,7 @@ def custom_notify(title: str, content: str) -> None:
 
     if "$title" not in WEBHOOK_URL and "$title" not in WEBHOOK_BODY:
         print("请求头或者请求体中必须包含 $title 和 $content")
-        return
+        return False
 
     headers = parse_headers(WEBHOOK_HEADERS)
     body = parse_body(
@@ -964,14 +1237,16 @@ def custom_notify(title: str, content: str) -> None:
     formatted_url = WEBHOOK_URL.replace(
         "$title", urllib.parse.quote_plus(title)
     ).replace("$content", urllib.parse.quote_plus(content))
-    response = requests.request(
-        method=WEBHOOK_METHOD, url=formatted_url, headers=headers, timeout=15, data=body
+    response = get_session().request(
+        method=WEBHOOK_METHOD, url=formatted_url, headers=headers, data=body
     )
 
     if response.status_code == 200:
         print("自定义通知推送成功！")
+        return True
     else:
         print(f"自定义通知推送失败！{response.status_code} {response.text}")
+        return False
 
 
 def one() -> str:
@@ -980,8 +1255,150 @@ def one() -> str:
     :return:
     """
     url = "https://v1.hitokoto.cn/"
-    res = requests.get(url).json()
-    return res["hitokoto"] + "    ----" + res["from"]
+    res = get_session().get(url).json()
+    if not isinstance(res, dict) or not isinstance(res.get("hitokoto"), str):
+        raise ValueError(f"一言接口返回数据异常：{res}")
+    return res["hitokoto"] + "    ----" + (res.get("from") or res.get("from_who") or "佚名")
+
+
+# 一言接口不可用且没有缓存时使用的句子
+# fmt: off
+HITOKOTO_OFFLINE = [
+    "千里之行，始于足下。    ----道德经",
+    "不积跬步，无以至千里；不积小流，无以成江海。    ----荀子",
+    "锲而舍之，朽木不折；锲而不舍，金石可镂。    ----荀子",
+    "学而不思则罔，思而不学则殆。    ----论语",
+    "天行健，君子以自强不息。    ----周易",
+    "路漫漫其修远兮，吾将上下而求索。    ----离骚",
+    "业精于勤，荒于嬉；行成于思，毁于随。    ----进学解",
+    "长风破浪会有时，直挂云帆济沧海。    ----行路难",
+    "会当凌绝顶，一览众山小。    ----望岳",
+    "海内存知己，天涯若比邻。    ----送杜少府之任蜀州",
+    "山重水复疑无路，柳暗花明又一村。    ----游山西村",
+    "纸上得来终觉浅，绝知此事要躬行。    ----冬夜读书示子聿",
+    "少壮不努力，老大徒伤悲。    ----长歌行",
+    "人生如逆旅，我亦是行人。    ----临江仙·送钱穆父",
+    "宝剑锋从磨砺出，梅花香自苦寒来。    ----警世贤文",
+]
+# fmt: on
+
+
+class Hitokoto:
+    """
+    一言提供者。
+    缓存不足 HITOKOTO_POOL 条时，推送时在后台线程池中获取一条新的一言补充缓存，推送内容使用已缓存的一言，不等待接口返回；
+    缓存保存在磁盘上，超过有效期的一言会被丢弃。没有可用缓存时最多等待 HITOKOTO_WAIT 秒，
+    接口失败或超时则使用内置的句子。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pool = None
+
+    @staticmethod
+    def cache_file() -> str:
+        return push_config.get("HITOKOTO_CACHE") or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "hitokoto_cache.json"
+        )
+
+    def fresh(self) -> list:
+        """
+        返回未过期的缓存，首次调用时从磁盘读取。调用方需持有 self.lock。
+        """
+        if self.pool is None:
+            try:
+                with open(self.cache_file(), "r", encoding="utf-8") as f:
+                    self.pool = [
+                        item
+                        for item in json.load(f)
+                        if isinstance(item, dict) and isinstance(item.get("text"), str)
+                    ]
+            except (OSError, ValueError, TypeError):
+                self.pool = []
+        expires = time.time() - float(push_config.get("HITOKOTO_TTL") or 604800)
+        self.pool = [item for item in self.pool if item.get("fetched", 0) > expires]
+        return self.pool
+
+    def fetch(self) -> str:
+        """
+        获取一条新的一言并存入缓存。
+        """
+        text = one()
+        with self.lock:
+            pool = [item for item in self.fresh() if item["text"] != text]
+            pool.append({"text": text, "fetched": time.time()})
+            self.pool = pool[-self.pool_size() :]
+            path = self.cache_file()
+            try:
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(self.pool, f, ensure_ascii=False)
+                os.replace(tmp, path)
+            except OSError as e:
+                print(f"一言缓存保存失败！{e}")
+        return text
+
+    @staticmethod
+    def pool_size() -> int:
+        return int(push_config.get("HITOKOTO_POOL") or 20)
+
+    def start(self) -> Future:
+        """
+        开始获取一言，返回 Future。
+        缓存中已有 HITOKOTO_POOL 条未过期的一言时不请求接口，返回已完成的 Future，结果为随机的一条缓存；
+        否则在推送线程池中获取一条新的一言补充缓存。
+        """
+        with self.lock:
+            pool = self.fresh()
+            if len(pool) >= self.pool_size():
+                future = Future()
+                future.set_result(random.choice(pool)["text"])
+                return future
+        return get_executor().submit(self.fetch)
+
+    def cached(self, future):
+        """
+        不等待地返回一条一言：已完成的本次请求或缓存，都没有时返回 None。
+        """
+        if future.done() and not future.exception():
+            return future.result()
+        with self.lock:
+            pool = self.fresh()
+            if pool:
+                return random.choice(pool)["text"]
+        return None
+
+    def pick(self, future) -> str:
+        """
+        返回一条一言：优先使用已完成的本次请求，其次是缓存，
+        都没有时最多等待 HITOKOTO_WAIT 秒，最后是内置的句子。会阻塞当前线程，供同步调用。
+        """
+        text = self.cached(future)
+        if text is not None:
+            return text
+        try:
+            return future.result(timeout=float(push_config.get("HITOKOTO_WAIT") or 0))
+        except Exception:
+            return random.choice(HITOKOTO_OFFLINE)
+
+    async def pick_async(self, future) -> str:
+        """
+        pick 的异步版本，等待本次请求时不阻塞事件循环。
+        """
+        text = self.cached(future)
+        if text is not None:
+            return text
+        try:
+            # shield 避免超时时取消线程池中的请求，请求完成后仍会存入缓存
+            return await asyncio.wait_for(
+                asyncio.shield(asyncio.wrap_future(future)),
+                float(push_config.get("HITOKOTO_WAIT") or 0),
+            )
+        except Exception:
+            return random.choice(HITOKOTO_OFFLINE)
+
+
+_hitokoto = Hitokoto()
 
 
 def add_notify_function():
@@ -1053,7 +1470,11 @@ def add_notify_function():
     return notify_function
 
 
-def send(title: str, content: str, ignore_default_config: bool = False, **kwargs):
+def prepare_push(title: str, content: str, ignore_default_config: bool = False, **kwargs):
+    """
+    读取推送配置并检查是否需要推送，返回 (已配置的渠道列表, 一言请求)，无需推送时返回 None。
+    一言请求在后台进行，不需要一言时为 None，由调用方通过 Hitokoto.pick / pick_async 取得一言。
+    """
     if kwargs:
         global push_config
         if ignore_default_config:
@@ -1063,25 +1484,161 @@ def send(title: str, content: str, ignore_default_config: bool = False, **kwargs
 
     if not content:
         print(f"{title} 推送内容为空！")
-        return
+        return None
 
     # 根据标题跳过一些消息推送，环境变量：SKIP_PUSH_TITLE 用回车分隔
     skipTitle = os.getenv("SKIP_PUSH_TITLE")
     if skipTitle:
         if title in re.split("\n", skipTitle):
             print(f"{title} 在SKIP_PUSH_TITLE环境变量内，跳过推送！")
-            return
-
-    hitokoto = push_config.get("HITOKOTO")
-    content += "\n\n" + one() if hitokoto != "false" else ""
+            return None
 
     notify_function = add_notify_function()
-    ts = [
-        threading.Thread(target=mode, args=(title, content), name=mode.__name__)
+    if not notify_function:
+        return None
+    # 一言在后台获取，与推送准备同时进行
+    quote = _hitokoto.start() if push_config.get("HITOKOTO") != "false" else None
+    return notify_function, quote
+
+
+async def push_channel(mode, title: str, content: str, timeout: float) -> dict:
+    """
+    在共用的线程池中执行一个推送渠道，最多等待 timeout 秒。
+    超时后不再等待，但线程池中的请求会继续执行到 PUSH_TIMEOUT 为止。
+    """
+    loop = asyncio.get_running_loop()
+    result = {"channel": mode.__name__, "status": "success", "error": None}
+    start = time.perf_counter()
+    try:
+        success = await asyncio.wait_for(
+            loop.run_in_executor(get_executor(), mode, title, content), timeout
+        )
+        if success is False:
+            result["status"] = "failure"
+    except asyncio.TimeoutError:
+        result["status"] = "timeout"
+        result["error"] = f"{timeout:g} 秒内未完成"
+    except Exception as e:
+        print(f"{mode.__name__} 推送失败！{e}")
+        result["status"] = "error"
+        result["error"] = str(e)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def push_channels(title: str, content: str, notify_function: list, timeouts: dict = None) -> list:
+    """
+    在共用的线程池中同时推送所有渠道，在当前线程中等待，返回与 push_channel 相同格式的推送结果。
+    用于在正在运行的事件循环中调用 send 的情况，此时无法使用 asyncio.run。
+    """
+    executor = get_executor()
+    start = time.perf_counter()
+    finished = {}
+    futures = []
+    for mode in notify_function:
+        future = executor.submit(mode, title, content)
+        future.add_done_callback(lambda f: finished.setdefault(f, time.perf_counter()))
+        futures.append((mode, future, channel_timeout(mode, timeouts)))
+
+    results = []
+    for mode, future, timeout in futures:
+        # 所有渠道同时开始，按各自的截止时间等待
+        wait([future], timeout=max(start + timeout - time.perf_counter(), 0))
+        end = finished.get(future, time.perf_counter())
+        result = {"channel": mode.__name__, "status": "success", "error": None}
+        if not future.done() or end - start > timeout:
+            result["status"] = "timeout"
+            result["error"] = f"{timeout:g} 秒内未完成"
+        elif future.exception():
+            print(f"{mode.__name__} 推送失败！{future.exception()}")
+            result["status"] = "error"
+            result["error"] = str(future.exception())
+        elif future.result() is False:
+            result["status"] = "failure"
+        result["seconds"] = round(end - start, 3)
+        results.append(result)
+    return results
+
+
+def report_unfinished(results: list) -> None:
+    unfinished = [result["channel"] for result in results if result["status"] == "timeout"]
+    if unfinished:
+        print(f"以下推送渠道未在规定时间内完成：{', '.join(unfinished)}")
+
+
+async def send_async(
+    title: str,
+    content: str,
+    ignore_default_config: bool = False,
+    timeouts: dict = None,
+    **kwargs,
+) -> list:
+    """
+    在事件循环中同时推送所有已配置的渠道，不阻塞事件循环，所有渠道最多共等待 PUSH_DEADLINE 秒。
+    每个渠道最多等待 timeouts 中指定的秒数（键为渠道函数名，如 {"smtp": 30}），超过 PUSH_DEADLINE 时按 PUSH_DEADLINE 计。
+    返回每个渠道的推送结果：
+    {"channel": 渠道名, "status": "success" / "failure" / "error" / "timeout", "error": 错误信息, "seconds": 耗时}
+    """
+    prepared = prepare_push(title, content, ignore_default_config, **kwargs)
+    if prepared is None:
+        return []
+    notify_function, quote = prepared
+    if quote is not None:
+        content += "\n\n" + await _hitokoto.pick_async(quote)
+
+    deadline = push_deadline()
+    tasks = [
+        asyncio.ensure_future(
+            push_channel(mode, title, content, channel_timeout(mode, timeouts))
+        )
         for mode in notify_function
     ]
-    [t.start() for t in ts]
-    [t.join() for t in ts]
+    done, _ = await asyncio.wait(tasks, timeout=deadline)
+    results = []
+    for mode, task in zip(notify_function, tasks):
+        if task in done:
+            results.append(task.result())
+            continue
+        task.cancel()
+        results.append(
+            {
+                "channel": mode.__name__,
+                "status": "timeout",
+                "error": f"{deadline:g} 秒内未完成",
+                "seconds": deadline,
+            }
+        )
+    report_unfinished(results)
+    return results
+
+
+def send(
+    title: str,
+    content: str,
+    ignore_default_config: bool = False,
+    timeouts: dict = None,
+    **kwargs,
+) -> list:
+    """
+    send_async 的同步版本，参数和返回值相同。
+    在正在运行的事件循环中调用时（如协程中直接调用 send），改为在共用的线程池中推送并阻塞等待。
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(
+            send_async(title, content, ignore_default_config, timeouts, **kwargs)
+        )
+
+    prepared = prepare_push(title, content, ignore_default_config, **kwargs)
+    if prepared is None:
+        return []
+    notify_function, quote = prepared
+    if quote is not None:
+        content += "\n\n" + _hitokoto.pick(quote)
+    results = push_channels(title, content, notify_function, timeouts)
+    report_unfinished(results)
+    return results
 
 
 def main():